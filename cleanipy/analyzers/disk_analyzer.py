@@ -2,165 +2,317 @@
 Disk space analysis functionality.
 """
 import os
+import sys
+import heapq
 import psutil
-from typing import List, Dict, Tuple, Generator
+from array import array
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Set, Tuple, Generator, NamedTuple
 from pathlib import Path
 
-from cleanipy.utils.file_utils import get_directory_size, get_file_size
+try:
+    import numpy
+except ImportError:
+    # NumPy is optional; scans are filtered in Python without it
+    numpy = None
+
+from cleanipy.utils.file_utils import walk_concurrent
 from cleanipy.utils.size_utils import format_size
 
 
+# Maximum number of partitions queried at the same time
+DISK_USAGE_WORKERS = 16
+
+# Scans with at least this many files are filtered with NumPy when it is installed
+BULK_SCAN_THRESHOLD = 10000
+
+
+def _get_partition_usage(partition):
+    """
+    Get usage statistics for a partition, ignoring partitions that can't be accessed.
+    
+    Args:
+        partition: Partition as returned by psutil.disk_partitions
+        
+    Returns:
+        Usage statistics, or None if the partition can't be accessed
+    """
+    try:
+        return psutil.disk_usage(partition.mountpoint)
+    except (PermissionError, FileNotFoundError, OSError):
+        return None
+
+
 def get_disk_usage() -> List[Dict[str, str]]:
     """
     Get disk usage information for all mounted partitions.
     
+    Partitions are queried in parallel, so a slow network mount doesn't
+    delay the others.
+    
     Returns:
         List of dictionaries with disk usage information
     """
     disk_info = []
+    partitions = psutil.disk_partitions()
+    if not partitions:
+        return disk_info
+    
+    with ThreadPoolExecutor(max_workers=min(DISK_USAGE_WORKERS, len(partitions))) as executor:
+        usages = list(executor.map(_get_partition_usage, partitions))
     
-    for partition in psutil.disk_partitions():
-        try:
-            usage = psutil.disk_usage(partition.mountpoint)
-            disk_info.append({
-                "device": partition.device,
-                "mountpoint": partition.mountpoint,
-                "filesystem": partition.fstype,
-                "total": format_size(usage.total),
-                "used": format_size(usage.used),
-                "free": format_size(usage.free),
-                "percent": f"{usage.percent}%"
-            })
-        except (PermissionError, FileNotFoundError):
+    for partition, usage in zip(partitions, usages):
+        if usage is None:
             # Skip partitions that can't be accessed
             continue
+        
+        disk_info.append({
+            "device": partition.device,
+            "mountpoint": partition.mountpoint,
+            "filesystem": partition.fstype,
+            "total": format_size(usage.total),
+            "used": format_size(usage.used),
+            "free": format_size(usage.free),
+            "percent": f"{usage.percent}%"
+        })
     
     return disk_info
 
 
-def get_directory_tree_size(directory: str, depth: int = 1) -> List[Dict[str, str]]:
+class DirectoryScan(NamedTuple):
+    """
+    Metadata collected by a single walk of a directory tree.
+    
+    Fields are kept as parallel arrays (one entry per directory or per file)
+    rather than one object per file, and sizes are packed 64-bit integers.
+    """
+    directory: str
+    # Directories in scan order (parents before their children)
+    directories: List[str]
+    # Index of each directory's parent in directories (-1 for the root)
+    parents: array
+    # Depth of each directory below the root
+    levels: array
+    # Total size of the files directly in each directory
+    dir_sizes: array
+    # Path and size of each regular file found
+    file_paths: List[str]
+    file_sizes: array
+
+
+def scan_directory(directory: str, skip: Set[str] = None) -> DirectoryScan:
+    """
+    Walk a directory tree once, collecting what the disk analysis needs.
+    
+    The result can be passed to get_directory_tree_size, find_large_files and
+    get_file_types_summary, so the tree is listed and stat'ed a single time
+    for all three.
+    
+    Args:
+        directory: Directory to scan
+        skip: Names of subdirectories not to descend into (e.g. DEFAULT_SKIP_DIRS)
+        
+    Returns:
+        DirectoryScan with the directories and files found
+    """
+    scan = DirectoryScan(directory, [], array("q"), array("q"), array("q"), [], array("q"))
+    
+    # Parent index and depth of each directory not yielded yet
+    pending = {directory: (-1, 0)}
+    
+    for dirpath, subdirs, files in walk_concurrent(directory, skip=skip):
+        index = len(scan.directories)
+        parent, level = pending.pop(dirpath)
+        scan.directories.append(dirpath)
+        scan.parents.append(parent)
+        scan.levels.append(level)
+        
+        total = 0
+        for file_path, st in files:
+            scan.file_paths.append(file_path)
+            scan.file_sizes.append(st.st_size)
+            total += st.st_size
+        scan.dir_sizes.append(total)
+        
+        for subdir in subdirs:
+            pending[subdir] = (index, level + 1)
+    
+    return scan
+
+
+def _iter_file_sizes(directory: str, skip: Set[str], scan: DirectoryScan) -> Generator[Tuple[str, int], None, None]:
+    """
+    Iterate over the files of a scan, or walk the directory if there is none.
+    
+    Args:
+        directory: Directory to walk when there is no scan
+        skip: Names of subdirectories not to descend into
+        scan: Result of scan_directory, or None
+        
+    Yields:
+        Tuples of (file path, size in bytes)
+    """
+    if scan is not None:
+        yield from zip(scan.file_paths, scan.file_sizes)
+        return
+    
+    for _, _, files in walk_concurrent(directory, skip=skip):
+        for file_path, st in files:
+            yield file_path, st.st_size
+
+
+def _select_large_files(scan: DirectoryScan, min_size_bytes: int, limit: int) -> List[Tuple[int, str]]:
+    """
+    Select the large files of a scan with NumPy, in a few array passes.
+    
+    Args:
+        scan: Result of scan_directory
+        min_size_bytes: Minimum file size in bytes
+        limit: Maximum number of files to select, or None for no limit
+        
+    Returns:
+        List of (size, file path) tuples, in no particular order
+    """
+    sizes = numpy.frombuffer(scan.file_sizes, dtype=numpy.int64)
+    selected = numpy.flatnonzero(sizes >= min_size_bytes)
+    
+    # Partial partition: only the largest files are put in place, nothing is sorted
+    if limit is not None and len(selected) > limit:
+        if limit > 0:
+            selected = selected[numpy.argpartition(sizes[selected], -limit)[-limit:]]
+        else:
+            selected = selected[:0]
+    
+    file_paths = scan.file_paths
+    return [(size, file_paths[index]) for index, size in zip(selected.tolist(), sizes[selected].tolist())]
+
+
+def get_directory_tree_size(directory: str, depth: int = 1, skip: Set[str] = None,
+                            scan: DirectoryScan = None) -> List[Dict[str, Any]]:
     """
     Get the size of subdirectories in the given directory up to a certain depth.
     
+    The tree is scanned once (listing several directories at a time) and sizes
+    are summed bottom-up, so each file is only counted a single time regardless
+    of depth.
+    
     Args:
         directory: Directory to analyze
         depth: Maximum depth to traverse
+        skip: Names of subdirectories not to descend into (e.g. DEFAULT_SKIP_DIRS)
+        scan: Result of scan_directory for the directory, to avoid walking it again
         
     Returns:
-        List of dictionaries with directory information
+        List of dictionaries with the directory "path", its total size in bytes
+        ("size_bytes") and that size formatted for display ("size")
     """
-    result = []
+    if scan is None:
+        scan = scan_directory(directory, skip)
     
-    try:
-        # Get immediate subdirectories
-        subdirs = [os.path.join(directory, d) for d in os.listdir(directory) 
-                  if os.path.isdir(os.path.join(directory, d))]
-        
-        # Calculate size for each subdirectory
-        for subdir in subdirs:
-            try:
-                size = get_directory_size(subdir)
-                result.append({
-                    "path": subdir,
-                    "size_bytes": size,
-                    "size": format_size(size)
-                })
-                
-                # Recursively get subdirectory sizes if depth allows
-                if depth > 1:
-                    subresult = get_directory_tree_size(subdir, depth - 1)
-                    for item in subresult:
-                        # Adjust the path to show the hierarchy
-                        item["path"] = os.path.join(os.path.basename(subdir), os.path.basename(item["path"]))
-                        result.append(item)
-            except (PermissionError, FileNotFoundError):
-                # Skip directories that can't be accessed
-                continue
-    except (PermissionError, FileNotFoundError):
-        # Return empty list if the directory can't be accessed
-        pass
+    directories = scan.directories
+    parents = scan.parents
+    levels = scan.levels
+    sizes = scan.dir_sizes.tolist()
+    
+    # Subdirectories are scanned after their parents, so walking the scan order
+    # backwards adds each directory's total to its parent once it is complete
+    for index in range(len(directories) - 1, 0, -1):
+        sizes[parents[index]] += sizes[index]
+    
+    # Order parents before their children
+    subdirs = [(os.path.relpath(directories[index], directory), index)
+               for index in range(1, len(directories)) if levels[index] <= depth]
+    subdirs.sort(key=lambda x: x[0].split(os.sep))
+    
+    result = []
+    for relpath, index in subdirs:
+        result.append({
+            # Show nested directories relative to the analyzed directory
+            "path": directories[index] if levels[index] == 1 else relpath,
+            "size_bytes": sizes[index],
+            "size": format_size(sizes[index])
+        })
     
     return result
 
 
-def find_large_files(directory: str, min_size_bytes: int = 100 * 1024 * 1024) -> List[Dict[str, str]]:
+def find_large_files(directory: str, min_size_bytes: int = 100 * 1024 * 1024,
+                     limit: int = None, skip: Set[str] = None,
+                     scan: DirectoryScan = None) -> List[Dict[str, Any]]:
     """
     Find files larger than the specified size.
     
     Args:
         directory: Directory to search in
         min_size_bytes: Minimum file size in bytes (default: 100 MB)
+        limit: Maximum number of files to return (default: no limit)
+        skip: Names of subdirectories not to descend into (e.g. DEFAULT_SKIP_DIRS)
+        scan: Result of scan_directory for the directory, to avoid walking it again
         
     Returns:
-        List of dictionaries with file information
+        List of dictionaries with the file "path" and its size in bytes
+        ("size_bytes"), largest first. Sizes are left unformatted so the caller
+        only formats the ones it displays (e.g. with format_size).
     """
     large_files = []
     
-    for dirpath, _, filenames in os.walk(directory):
-        for filename in filenames:
-            try:
-                file_path = os.path.join(dirpath, filename)
-                if os.path.islink(file_path):
-                    continue
-                    
-                size = get_file_size(file_path)
-                if size >= min_size_bytes:
-                    large_files.append({
-                        "path": file_path,
-                        "size_bytes": size,
-                        "size": format_size(size)
-                    })
-            except (PermissionError, FileNotFoundError):
-                # Skip files that can't be accessed
+    if scan is not None and numpy is not None and len(scan.file_sizes) >= BULK_SCAN_THRESHOLD:
+        large_files = _select_large_files(scan, min_size_bytes, limit)
+    else:
+        for file_path, size in _iter_file_sizes(directory, skip, scan):
+            if size < min_size_bytes:
                 continue
+            
+            if limit is None:
+                large_files.append((size, file_path))
+            elif len(large_files) < limit:
+                heapq.heappush(large_files, (size, file_path))
+            elif large_files and size > large_files[0][0]:
+                # Keep only the largest files seen so far in a min-heap
+                heapq.heapreplace(large_files, (size, file_path))
     
     # Sort by size (largest first)
-    large_files.sort(key=lambda x: x["size_bytes"], reverse=True)
+    large_files.sort(key=lambda x: x[0], reverse=True)
     
-    return large_files
+    # Sizes are formatted by the caller, only for the files actually displayed
+    return [{
+        "path": file_path,
+        "size_bytes": size
+    } for size, file_path in large_files]
 
 
-def get_file_types_summary(directory: str) -> Dict[str, Dict[str, str]]:
+def get_file_types_summary(directory: str, skip: Set[str] = None,
+                           scan: DirectoryScan = None) -> Dict[str, Dict[str, int]]:
     """
     Get a summary of file types and their total sizes.
     
     Args:
         directory: Directory to analyze
+        skip: Names of subdirectories not to descend into (e.g. DEFAULT_SKIP_DIRS)
+        scan: Result of scan_directory for the directory, to avoid walking it again
         
     Returns:
-        Dictionary with file type information
+        Dictionary mapping each extension to the number of files ("count") and
+        their total size in bytes ("total_size_bytes"). Sizes are left
+        unformatted so the caller only formats the types it displays.
     """
-    file_types = {}
+    # Accumulate [count, total size] per extension while walking
+    totals = defaultdict(lambda: [0, 0])
     
-    for dirpath, _, filenames in os.walk(directory):
-        for filename in filenames:
-            try:
-                file_path = os.path.join(dirpath, filename)
-                if os.path.islink(file_path):
-                    continue
-                
-                # Get file extension (lowercase)
-                _, ext = os.path.splitext(filename)
-                ext = ext.lower() if ext else "no extension"
-                
-                # Get file size
-                size = get_file_size(file_path)
-                
-                # Update file type statistics
-                if ext not in file_types:
-                    file_types[ext] = {
-                        "count": 0,
-                        "total_size_bytes": 0
-                    }
-                
-                file_types[ext]["count"] += 1
-                file_types[ext]["total_size_bytes"] += size
-            except (PermissionError, FileNotFoundError):
-                # Skip files that can't be accessed
-                continue
+    for file_path, size in _iter_file_sizes(directory, skip, scan):
+        # Get file extension (lowercase)
+        _, ext = os.path.splitext(file_path)
+        row = totals[sys.intern(ext.lower()) if ext else "no extension"]
+        row[0] += 1
+        row[1] += size
     
-    # Add formatted size
-    for ext in file_types:
-        file_types[ext]["total_size"] = format_size(file_types[ext]["total_size_bytes"])
+    # Build the result (sizes are formatted by the caller, only for the types displayed)
+    file_types = {}
+    for ext, (count, total_size) in totals.items():
+        file_types[ext] = {
+            "count": count,
+            "total_size_bytes": total_size
+        }
     
     return file_types
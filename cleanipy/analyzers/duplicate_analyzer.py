@@ -2,13 +2,75 @@
 Duplicate file analysis functionality.
 """
 import os
+import heapq
 from collections import defaultdict
 from typing import List, Dict, Set, Generator, Tuple
 
-from cleanipy.utils.file_utils import get_file_size, get_file_hash
+from cleanipy.utils.file_utils import (
+    get_file_prefix_hash, hash_files_parallel, iter_files, PREFIX_HASH_SIZE
+)
+from cleanipy.utils.cache import HashCache
+from cleanipy.utils.device import get_device_profile
 from cleanipy.utils.size_utils import format_size
 
 
+def group_files_by_size(directory: str, min_size: int = 1024) -> Tuple[Dict[int, List[str]], Dict[str, List[str]]]:
+    """
+    Group files by size, coalescing hard links to the same file.
+    
+    Only the first path seen for each inode is added to the size groups; the
+    other paths are recorded as its hard links, since they are already known
+    to have the same content.
+    
+    Args:
+        directory: Directory to search in
+        min_size: Minimum file size to consider (to avoid small files)
+        
+    Returns:
+        Tuple of (dictionary with file sizes as keys and lists of file paths as values,
+        dictionary mapping file paths to their other hard link paths). Sizes with
+        a single file are left out unless that file has hard links.
+    """
+    # Most sizes are unique, so the first path for a size is stored on its own
+    # and only promoted to a list when a second file of that size is found
+    size_dict = {}
+    seen_inodes = {}
+    hardlinks = {}
+    
+    for file_path, st in iter_files(directory):
+        # Only consider files larger than min_size
+        size = st.st_size
+        if size < min_size:
+            continue
+        
+        # Only files with several links can be hard links (Windows reports 0 links here)
+        if st.st_nlink > 1:
+            inode = (st.st_dev, st.st_ino)
+            first_path = seen_inodes.get(inode)
+            if first_path is not None:
+                hardlinks.setdefault(first_path, []).append(file_path)
+                continue
+            seen_inodes[inode] = file_path
+        
+        files = size_dict.get(size)
+        if files is None:
+            size_dict[size] = file_path
+        elif isinstance(files, str):
+            size_dict[size] = [files, file_path]
+        else:
+            files.append(file_path)
+    
+    # Keep sizes shared by several files, or by a file with hard links
+    result = {}
+    for size, files in size_dict.items():
+        if not isinstance(files, str):
+            result[size] = files
+        elif files in hardlinks:
+            result[size] = [files]
+    
+    return result, hardlinks
+
+
 def find_duplicate_files_by_size(directory: str, min_size: int = 1024) -> Dict[int, List[str]]:
     """
     Find potential duplicate files by size.
@@ -20,79 +82,168 @@ def find_duplicate_files_by_size(directory: str, min_size: int = 1024) -> Dict[i
     Returns:
         Dictionary with file sizes as keys and lists of file paths as values
     """
-    size_dict = defaultdict(list)
+    size_dict, hardlinks = group_files_by_size(directory, min_size)
     
-    for dirpath, _, filenames in os.walk(directory):
-        for filename in filenames:
-            try:
-                file_path = os.path.join(dirpath, filename)
-                if os.path.islink(file_path):
-                    continue
-                
-                # Get file size
-                size = get_file_size(file_path)
-                
-                # Only consider files larger than min_size
-                if size >= min_size:
-                    size_dict[size].append(file_path)
-            except (PermissionError, FileNotFoundError):
-                # Skip files that can't be accessed
-                continue
+    # Expand hard links and filter out sizes with only one file (no duplicates)
+    result = {}
+    for size, files in size_dict.items():
+        all_files = [path for file_path in files for path in [file_path] + hardlinks.get(file_path, [])]
+        if len(all_files) > 1:
+            result[size] = all_files
     
-    # Filter out sizes with only one file (no duplicates)
-    return {size: files for size, files in size_dict.items() if len(files) > 1}
+    return result
 
 
-def find_duplicate_files_by_content(directory: str, min_size: int = 1024) -> Dict[str, List[Dict[str, any]]]:
+def iter_duplicate_files(directory: str, min_size: int = 1024,
+                         cache_path: str = None) -> Generator[Tuple[str, List[Dict[str, any]]], None, None]:
     """
-    Find duplicate files by content (using hash).
+    Find duplicate files by content (using hash), yielding each set as soon as it is complete.
+    
+    All files in a duplicate set have the same size, so a set is complete once
+    every candidate of that size has been hashed. Hard links to the same file
+    are only hashed once. If the caller stops early, remaining hashes are cancelled.
     
     Args:
         directory: Directory to search in
         min_size: Minimum file size to consider (to avoid small files)
+        cache_path: Path to the hash cache database (default: hashes.db in the cache
+            directory, ":memory:" for a cache that isn't kept)
         
-    Returns:
-        Dictionary with file hashes as keys and lists of file information as values
+    Yields:
+        Tuples of (file hash, list of file information with path, size_bytes and mtime)
     """
     # First, find potential duplicates by size
-    size_dict = find_duplicate_files_by_size(directory, min_size)
+    size_dict, hardlinks = group_files_by_size(directory, min_size)
+    
+    def link_count(file_path):
+        return 1 + len(hardlinks.get(file_path, []))
+    
+    def add_file(hash_dict, file_hash, file_path, size, mtime):
+        # Add the file along with its hard links, which share its content and mtime
+        for path in [file_path] + hardlinks.get(file_path, []):
+            hash_dict[file_hash].append({
+                "path": path,
+                "size_bytes": size,
+                "mtime": mtime
+            })
+    
+    def duplicate_sets(hash_dict):
+        # Filter out hashes with only one file (no duplicates)
+        for hash_val, files in hash_dict.items():
+            if len(files) > 1:
+                yield hash_val, files
     
     # Then, check content hash for files of the same size
-    hash_dict = defaultdict(list)
+    candidates = defaultdict(list)
     
     for size, files in size_dict.items():
-        for file_path in files:
-            try:
-                # Calculate file hash
-                file_hash = get_file_hash(file_path)
-                
-                if file_hash:  # Skip if hash calculation failed
-                    hash_dict[file_hash].append({
-                        "path": file_path,
-                        "size_bytes": size,
-                        "size": format_size(size)
-                    })
-            except (PermissionError, FileNotFoundError):
-                # Skip files that can't be accessed
+        if len(files) > 1:
+            # Narrow down candidates by hashing only the start and end of each file
+            prefix_dict = defaultdict(list)
+            for file_path in files:
+                prefix_hash = get_file_prefix_hash(file_path, size=size)
+                if prefix_hash:  # Skip if hash calculation failed
+                    prefix_dict[prefix_hash].append(file_path)
+            groups = prefix_dict.items()
+        else:
+            # A single file with hard links doesn't need to be narrowed down
+            groups = [("", files)]
+        
+        hash_dict = defaultdict(list)
+        for prefix_hash, paths in groups:
+            if sum(link_count(file_path) for file_path in paths) < 2:
                 continue
+            
+            for file_path in paths:
+                # Small files are read in full, so the prefix hash is the file hash
+                if size <= PREFIX_HASH_SIZE:
+                    file_hash = prefix_hash or get_file_prefix_hash(file_path, size=size)
+                    if file_hash:  # Skip if hash calculation failed
+                        try:
+                            mtime = os.stat(file_path).st_mtime
+                        except OSError:
+                            # Skip files that can't be accessed
+                            continue
+                        add_file(hash_dict, file_hash, file_path, size, mtime)
+                else:
+                    candidates[size].append(file_path)
+        
+        yield from duplicate_sets(hash_dict)
+    
+    # Match thread count, read size and mmap use to the underlying device
+    workers, block_size, use_mmap = get_device_profile(directory)
     
-    # Filter out hashes with only one file (no duplicates)
-    return {hash_val: files for hash_val, files in hash_dict.items() if len(files) > 1}
+    with HashCache(cache_path) as cache:
+        # Reuse hashes from previous runs for files that haven't changed
+        jobs = []
+        to_hash = []
+        for size, paths in candidates.items():
+            entries = []
+            for file_path in paths:
+                try:
+                    st = os.stat(file_path)
+                except OSError:
+                    # Skip files that can't be accessed
+                    continue
+                
+                file_hash = cache.get(file_path, st)
+                if not file_hash:
+                    to_hash.append(file_path)
+                entries.append((file_path, st, file_hash))
+            jobs.append((size, entries))
+        
+        # Hash the rest in parallel, in the order they are collected below
+        hashes = hash_files_parallel(to_hash, workers, block_size, use_mmap)
+        
+        try:
+            # Collect the results one size at a time
+            for size, entries in jobs:
+                hash_dict = defaultdict(list)
+                for file_path, st, file_hash in entries:
+                    if not file_hash:
+                        file_hash = next(hashes)
+                        if file_hash:
+                            cache.put(file_path, st, file_hash)
+                    
+                    if file_hash:  # Skip if hash calculation failed
+                        add_file(hash_dict, file_hash, file_path, size, st.st_mtime)
+                
+                yield from duplicate_sets(hash_dict)
+        finally:
+            # Don't keep hashing files if the caller stopped early
+            hashes.close()
 
 
-def analyze_duplicate_files(directory: str, min_size: int = 1024) -> Dict[str, any]:
+def find_duplicate_files_by_content(directory: str, min_size: int = 1024,
+                                    cache_path: str = None) -> Dict[str, List[Dict[str, any]]]:
+    """
+    Find duplicate files by content (using hash).
+    
+    Args:
+        directory: Directory to search in
+        min_size: Minimum file size to consider (to avoid small files)
+        cache_path: Path to the hash cache database (see iter_duplicate_files)
+        
+    Returns:
+        Dictionary with file hashes as keys and lists of file information as values
+    """
+    return dict(iter_duplicate_files(directory, min_size, cache_path))
+
+
+def analyze_duplicate_files(directory: str, min_size: int = 1024, cache_path: str = None) -> Dict[str, any]:
     """
     Analyze duplicate files in a directory.
     
     Args:
         directory: Directory to analyze
         min_size: Minimum file size to consider (to avoid small files)
+        cache_path: Path to the hash cache database (see iter_duplicate_files)
         
     Returns:
         Dictionary with analysis results
     """
     # Find duplicate files
-    duplicates = find_duplicate_files_by_content(directory, min_size)
+    duplicates = find_duplicate_files_by_content(directory, min_size, cache_path)
     
     # Calculate statistics
     total_duplicate_sets = len(duplicates)
@@ -112,7 +263,9 @@ def analyze_duplicate_files(directory: str, min_size: int = 1024) -> Dict[str, a
     return result
 
 
-def get_duplicate_sets(directory: str, min_size: int = 1024, limit: int = 10) -> List[Dict[str, any]]:
+def get_duplicate_sets(directory: str, min_size: int = 1024, limit: int = 10,
+                       duplicates: Dict[str, List[Dict[str, any]]] = None,
+                       cache_path: str = None) -> List[Dict[str, any]]:
     """
     Get sets of duplicate files, sorted by wasted space.
     
@@ -120,28 +273,35 @@ def get_duplicate_sets(directory: str, min_size: int = 1024, limit: int = 10) ->
         directory: Directory to analyze
         min_size: Minimum file size to consider
         limit: Maximum number of duplicate sets to return
+        duplicates: Dictionary of duplicate files, e.g. from analyze_duplicate_files
+            (if None, will be calculated)
+        cache_path: Path to the hash cache database (see iter_duplicate_files)
         
     Returns:
         List of dictionaries with duplicate file information
     """
-    # Find duplicate files
-    duplicates = find_duplicate_files_by_content(directory, min_size)
+    # Find duplicate files if not provided (streaming them, so only the top sets are kept)
+    if duplicates is None:
+        duplicate_items = iter_duplicate_files(directory, min_size, cache_path)
+    else:
+        duplicate_items = duplicates.items()
+    
+    def wasted_space(item):
+        files = item[1]
+        return (len(files) - 1) * files[0]["size_bytes"]
     
-    # Convert to list and calculate wasted space for each set
+    # Keep the sets with the most wasted space (largest first)
     duplicate_sets = []
-    for hash_val, files in duplicates.items():
-        wasted_space = (len(files) - 1) * files[0]["size_bytes"]
+    for item in heapq.nlargest(limit, duplicate_items, key=wasted_space):
+        hash_val, files = item
+        wasted = wasted_space(item)
         duplicate_sets.append({
             "hash": hash_val,
             "files": files,
             "count": len(files),
-            "wasted_space_bytes": wasted_space,
-            "wasted_space": format_size(wasted_space),
-            "file_size": files[0]["size"]
+            "wasted_space_bytes": wasted,
+            "wasted_space": format_size(wasted),
+            "file_size": format_size(files[0]["size_bytes"])
         })
     
-    # Sort by wasted space (largest first)
-    duplicate_sets.sort(key=lambda x: x["wasted_space_bytes"], reverse=True)
-    
-    # Limit the number of sets
-    return duplicate_sets[:limit]
+    return duplicate_sets
@@ -5,18 +5,23 @@ import os
 import tempfile
 import platform
 from pathlib import Path
-from typing import List, Dict, Set, Generator
+from typing import List, Dict, Set, Generator, Tuple
 
-from cleanipy.utils.file_utils import get_file_size, is_file_older_than
+from cleanipy.utils.file_utils import get_age_cutoff_ns, iter_files
 from cleanipy.utils.size_utils import format_size
 
 
-def get_system_temp_dirs() -> List[str]:
+# Platform and home directory, looked up once at import time
+_SYSTEM = platform.system()
+_HOME = os.path.expanduser("~")
+
+
+def _build_system_temp_dirs() -> Tuple[str, ...]:
     """
-    Get system temporary directories.
+    Build the candidate system temporary directories for this platform.
     
     Returns:
-        List of temporary directory paths
+        Tuple of temporary directory paths
     """
     temp_dirs = []
     
@@ -24,22 +29,21 @@ def get_system_temp_dirs() -> List[str]:
     temp_dirs.append(tempfile.gettempdir())
     
     # Add OS-specific temp directories
-    system = platform.system()
-    if system == "Windows":
+    if _SYSTEM == "Windows":
         # Windows temp directories
         temp_dirs.extend([
             os.path.expandvars("%TEMP%"),
             os.path.expandvars("%TMP%"),
             os.path.join(os.path.expandvars("%WINDIR%"), "Temp")
         ])
-    elif system == "Darwin":
+    elif _SYSTEM == "Darwin":
         # macOS temp directories
         temp_dirs.extend([
             "/tmp",
             "/var/tmp",
-            os.path.expanduser("~/Library/Caches")
+            os.path.join(_HOME, "Library", "Caches")
         ])
-    elif system == "Linux":
+    elif _SYSTEM == "Linux":
         # Linux temp directories
         temp_dirs.extend([
             "/tmp",
@@ -47,88 +51,110 @@ def get_system_temp_dirs() -> List[str]:
             "/var/cache"
         ])
     
-    # Remove duplicates and non-existent directories
-    temp_dirs = list(set(temp_dirs))
-    temp_dirs = [d for d in temp_dirs if os.path.exists(d)]
-    
-    return temp_dirs
+    # Remove duplicates
+    return tuple(dict.fromkeys(temp_dirs))
 
 
-def get_browser_cache_dirs() -> List[str]:
+def _build_browser_cache_dirs() -> Tuple[str, ...]:
     """
-    Get browser cache directories.
+    Build the candidate browser cache directories for this platform.
     
     Returns:
-        List of browser cache directory paths
+        Tuple of browser cache directory paths
     """
-    cache_dirs = []
-    home = os.path.expanduser("~")
-    system = platform.system()
-    
-    if system == "Windows":
+    if _SYSTEM == "Windows":
         # Windows browser cache paths
-        cache_dirs.extend([
-            os.path.join(home, "AppData", "Local", "Google", "Chrome", "User Data", "Default", "Cache"),
-            os.path.join(home, "AppData", "Local", "Mozilla", "Firefox", "Profiles"),
-            os.path.join(home, "AppData", "Local", "Microsoft", "Edge", "User Data", "Default", "Cache")
-        ])
-    elif system == "Darwin":
+        return (
+            os.path.join(_HOME, "AppData", "Local", "Google", "Chrome", "User Data", "Default", "Cache"),
+            os.path.join(_HOME, "AppData", "Local", "Mozilla", "Firefox", "Profiles"),
+            os.path.join(_HOME, "AppData", "Local", "Microsoft", "Edge", "User Data", "Default", "Cache")
+        )
+    elif _SYSTEM == "Darwin":
         # macOS browser cache paths
-        cache_dirs.extend([
-            os.path.join(home, "Library", "Caches", "Google", "Chrome"),
-            os.path.join(home, "Library", "Caches", "Firefox"),
-            os.path.join(home, "Library", "Caches", "com.apple.Safari")
-        ])
-    elif system == "Linux":
+        return (
+            os.path.join(_HOME, "Library", "Caches", "Google", "Chrome"),
+            os.path.join(_HOME, "Library", "Caches", "Firefox"),
+            os.path.join(_HOME, "Library", "Caches", "com.apple.Safari")
+        )
+    elif _SYSTEM == "Linux":
         # Linux browser cache paths
-        cache_dirs.extend([
-            os.path.join(home, ".cache", "google-chrome"),
-            os.path.join(home, ".cache", "mozilla", "firefox"),
-            os.path.join(home, ".cache", "chromium")
-        ])
+        return (
+            os.path.join(_HOME, ".cache", "google-chrome"),
+            os.path.join(_HOME, ".cache", "mozilla", "firefox"),
+            os.path.join(_HOME, ".cache", "chromium")
+        )
     
-    # Remove non-existent directories
-    cache_dirs = [d for d in cache_dirs if os.path.exists(d)]
-    
-    return cache_dirs
+    return ()
 
 
-def get_package_cache_dirs() -> List[str]:
+def _build_package_cache_dirs() -> Tuple[str, ...]:
     """
-    Get package manager cache directories.
+    Build the candidate package manager cache directories for this platform.
     
     Returns:
-        List of package manager cache directory paths
+        Tuple of package manager cache directory paths
     """
-    cache_dirs = []
-    home = os.path.expanduser("~")
-    system = platform.system()
-    
-    if system == "Windows":
+    if _SYSTEM == "Windows":
         # Windows package manager cache paths
-        cache_dirs.extend([
-            os.path.join(home, "AppData", "Local", "pip", "Cache"),
-            os.path.join(home, "AppData", "Local", "Temp", "chocolatey")
-        ])
-    elif system == "Darwin":
+        return (
+            os.path.join(_HOME, "AppData", "Local", "pip", "Cache"),
+            os.path.join(_HOME, "AppData", "Local", "Temp", "chocolatey")
+        )
+    elif _SYSTEM == "Darwin":
         # macOS package manager cache paths
-        cache_dirs.extend([
-            os.path.join(home, "Library", "Caches", "pip"),
-            os.path.join(home, "Library", "Caches", "Homebrew")
-        ])
-    elif system == "Linux":
+        return (
+            os.path.join(_HOME, "Library", "Caches", "pip"),
+            os.path.join(_HOME, "Library", "Caches", "Homebrew")
+        )
+    elif _SYSTEM == "Linux":
         # Linux package manager cache paths
-        cache_dirs.extend([
+        return (
             "/var/cache/apt/archives",
             "/var/cache/pacman/pkg",
             "/var/cache/yum",
-            os.path.join(home, ".cache", "pip")
-        ])
+            os.path.join(_HOME, ".cache", "pip")
+        )
+    
+    return ()
+
+
+# Candidate directories, built once at import time
+_TEMP_DIRS = _build_system_temp_dirs()
+_BROWSER_CACHE_DIRS = _build_browser_cache_dirs()
+_PACKAGE_CACHE_DIRS = _build_package_cache_dirs()
+
+
+def get_system_temp_dirs() -> List[str]:
+    """
+    Get system temporary directories.
     
+    Returns:
+        List of temporary directory paths
+    """
     # Remove non-existent directories
-    cache_dirs = [d for d in cache_dirs if os.path.exists(d)]
+    return [d for d in _TEMP_DIRS if os.path.exists(d)]
+
+
+def get_browser_cache_dirs() -> List[str]:
+    """
+    Get browser cache directories.
     
-    return cache_dirs
+    Returns:
+        List of browser cache directory paths
+    """
+    # Remove non-existent directories
+    return [d for d in _BROWSER_CACHE_DIRS if os.path.exists(d)]
+
+
+def get_package_cache_dirs() -> List[str]:
+    """
+    Get package manager cache directories.
+    
+    Returns:
+        List of package manager cache directory paths
+    """
+    # Remove non-existent directories
+    return [d for d in _PACKAGE_CACHE_DIRS if os.path.exists(d)]
 
 
 def analyze_temp_files(directory: str, min_age_days: int = 7) -> Dict[str, any]:
@@ -151,37 +177,25 @@ def analyze_temp_files(directory: str, min_age_days: int = 7) -> Dict[str, any]:
         "old_files": []
     }
     
-    try:
-        for dirpath, _, filenames in os.walk(directory):
-            for filename in filenames:
-                try:
-                    file_path = os.path.join(dirpath, filename)
-                    if os.path.islink(file_path):
-                        continue
-                    
-                    # Get file size
-                    size = get_file_size(file_path)
-                    result["total_size_bytes"] += size
-                    result["total_count"] += 1
-                    
-                    # Check if file is old enough
-                    if is_file_older_than(file_path, min_age_days):
-                        result["old_files_size_bytes"] += size
-                        result["old_files_count"] += 1
-                        
-                        # Add to old files list (limit to avoid excessive memory usage)
-                        if len(result["old_files"]) < 1000:
-                            result["old_files"].append({
-                                "path": file_path,
-                                "size_bytes": size,
-                                "size": format_size(size)
-                            })
-                except (PermissionError, FileNotFoundError):
-                    # Skip files that can't be accessed
-                    continue
-    except (PermissionError, FileNotFoundError):
-        # Return empty result if the directory can't be accessed
-        pass
+    # Files modified before this time (in nanoseconds) are considered old
+    cutoff_ns = get_age_cutoff_ns(min_age_days)
+    
+    for file_path, st in iter_files(directory):
+        size = st.st_size
+        result["total_size_bytes"] += size
+        result["total_count"] += 1
+        
+        # Check if file is old enough (if min_age_days is 0, all files are considered newer)
+        if min_age_days > 0 and st.st_mtime_ns < cutoff_ns:
+            result["old_files_size_bytes"] += size
+            result["old_files_count"] += 1
+            
+            # Add to old files list (limit to avoid excessive memory usage)
+            if len(result["old_files"]) < 1000:
+                result["old_files"].append({
+                    "path": file_path,
+                    "size_bytes": size
+                })
     
     # Add formatted sizes
     result["total_size"] = format_size(result["total_size_bytes"])
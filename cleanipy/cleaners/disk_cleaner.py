@@ -2,16 +2,24 @@
 Disk cleaning functionality.
 """
 import os
-import shutil
-from typing import List, Dict, Callable
+import stat
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Callable, Tuple
 from pathlib import Path
 
 from send2trash import send2trash
 
-from cleanipy.utils.file_utils import get_file_size, is_file_older_than
+from cleanipy.utils.device import get_device_profile
+from cleanipy.utils.file_utils import (
+    TRASH_LOCK, get_age_cutoff_ns, get_path_prefix, is_entry_older_than, iter_file_entries, iter_files
+)
 from cleanipy.utils.size_utils import format_size
 
 
+# Number of files sent to the trash per send2trash call
+TRASH_BATCH_SIZE = 256
+
+
 def clean_directory(directory: str, callback: Callable = None) -> Dict[str, any]:
     """
     Clean a directory by removing all files and subdirectories.
@@ -31,33 +39,49 @@ def clean_directory(directory: str, callback: Callable = None) -> Dict[str, any]
         "error": None
     }
     
+    def raise_for_root(error):
+        # Fail if the directory itself can't be read, skip inaccessible subdirectories
+        if error.filename == directory:
+            raise error
+    
     try:
-        # Calculate total size before cleaning
-        for dirpath, dirnames, filenames in os.walk(directory):
+        # Remove everything bottom-up in a single pass, so directories are empty
+        # by the time they are reached
+        for dirpath, dirnames, filenames in os.walk(directory, topdown=False, onerror=raise_for_root):
+            is_top_level = dirpath == directory
+            prefix = get_path_prefix(dirpath)
+            
             for filename in filenames:
+                file_path = prefix + filename
                 try:
-                    file_path = os.path.join(dirpath, filename)
-                    if not os.path.islink(file_path):
-                        size = get_file_size(file_path)
-                        result["total_size_bytes"] += size
-                        result["total_count"] += 1
-                except (PermissionError, FileNotFoundError):
+                    st = os.lstat(file_path)
+                    os.unlink(file_path)
+                except (PermissionError, FileNotFoundError, OSError):
+                    # Skip items that can't be removed
+                    continue
+                
+                # Only count regular files, not symbolic links
+                if not stat.S_ISLNK(st.st_mode):
+                    result["total_size_bytes"] += st.st_size
+                    result["total_count"] += 1
+                
+                if callback and is_top_level:
+                    callback(file_path)
+            
+            for dirname in dirnames:
+                subdir_path = prefix + dirname
+                try:
+                    try:
+                        os.rmdir(subdir_path)
+                    except NotADirectoryError:
+                        # Symbolic links to directories are listed as directories
+                        os.unlink(subdir_path)
+                except (PermissionError, FileNotFoundError, OSError):
+                    # Skip items that can't be removed
                     continue
-        
-        # Clean the directory
-        for item in os.listdir(directory):
-            item_path = os.path.join(directory, item)
-            try:
-                if os.path.isdir(item_path):
-                    shutil.rmtree(item_path)
-                else:
-                    os.remove(item_path)
                 
-                if callback:
-                    callback(item_path)
-            except (PermissionError, FileNotFoundError, OSError) as e:
-                # Skip items that can't be removed
-                continue
+                if callback and is_top_level:
+                    callback(subdir_path)
         
         result["success"] = True
     except (PermissionError, FileNotFoundError, OSError) as e:
@@ -70,7 +94,8 @@ def clean_directory(directory: str, callback: Callable = None) -> Dict[str, any]
     return result
 
 
-def clean_old_files(directory: str, min_age_days: int = 30, callback: Callable = None) -> Dict[str, any]:
+def clean_old_files(directory: str, min_age_days: int = 30, callback: Callable = None,
+                    permanent: bool = False) -> Dict[str, any]:
     """
     Clean old files in a directory.
     
@@ -78,6 +103,7 @@ def clean_old_files(directory: str, min_age_days: int = 30, callback: Callable =
         directory: Directory to clean
         min_age_days: Minimum age of files in days to remove
         callback: Optional callback function to report progress
+        permanent: Delete files permanently instead of sending them to the trash
         
     Returns:
         Dictionary with cleaning results
@@ -90,42 +116,19 @@ def clean_old_files(directory: str, min_age_days: int = 30, callback: Callable =
         "error": None
     }
     
+    # Files modified before this time (in nanoseconds) are considered old
+    cutoff_ns = get_age_cutoff_ns(min_age_days)
+    
     try:
-        for dirpath, _, filenames in os.walk(directory):
-            for filename in filenames:
-                try:
-                    file_path = os.path.join(dirpath, filename)
-                    if os.path.islink(file_path):
-                        continue
-                    
-                    # Check if file is old enough
-                    if is_file_older_than(file_path, min_age_days):
-                        # Get file size before removing
-                        size = get_file_size(file_path)
-                        
-                        # Remove the file
-                        try:
-                            send2trash(file_path)
-                            result["total_size_bytes"] += size
-                            result["total_count"] += 1
-                            
-                            if callback:
-                                callback(file_path)
-                        except Exception:
-                            # Try regular delete if send2trash fails
-                            try:
-                                os.remove(file_path)
-                                result["total_size_bytes"] += size
-                                result["total_count"] += 1
-                                
-                                if callback:
-                                    callback(file_path)
-                            except (PermissionError, FileNotFoundError, OSError):
-                                # Skip files that can't be removed
-                                continue
-                except (PermissionError, FileNotFoundError):
-                    # Skip files that can't be accessed
-                    continue
+        # Collect old files first (if min_age_days is 0, all files are considered newer);
+        # the size comes from the stat result cached by the age check
+        files = []
+        if min_age_days > 0:
+            files = [(entry.path, entry.stat(follow_symlinks=False).st_size)
+                     for entry in iter_file_entries(directory) if is_entry_older_than(entry, cutoff_ns)]
+        
+        # Remove the files
+        remove_files(files, result, callback, permanent)
     except (PermissionError, FileNotFoundError, OSError) as e:
         result["success"] = False
         result["error"] = str(e)
@@ -137,7 +140,8 @@ def clean_old_files(directory: str, min_age_days: int = 30, callback: Callable =
 
 
 def clean_large_files(directory: str, min_size_bytes: int = 100 * 1024 * 1024, 
-                     file_paths: List[str] = None, callback: Callable = None) -> Dict[str, any]:
+                     file_paths: List[str] = None, callback: Callable = None,
+                     permanent: bool = False) -> Dict[str, any]:
     """
     Clean large files in a directory or specific files.
     
@@ -146,6 +150,7 @@ def clean_large_files(directory: str, min_size_bytes: int = 100 * 1024 * 1024,
         min_size_bytes: Minimum file size in bytes to remove
         file_paths: Specific file paths to remove (if provided, directory and min_size are ignored)
         callback: Optional callback function to report progress
+        permanent: Delete files permanently instead of sending them to the trash
         
     Returns:
         Dictionary with cleaning results
@@ -158,72 +163,28 @@ def clean_large_files(directory: str, min_size_bytes: int = 100 * 1024 * 1024,
     }
     
     try:
+        files = []
+        
         # If specific file paths are provided, clean those
         if file_paths:
             for file_path in file_paths:
                 try:
-                    if os.path.isfile(file_path) and not os.path.islink(file_path):
-                        # Get file size before removing
-                        size = get_file_size(file_path)
-                        
-                        # Remove the file
-                        try:
-                            send2trash(file_path)
-                            result["total_size_bytes"] += size
-                            result["total_count"] += 1
-                            
-                            if callback:
-                                callback(file_path)
-                        except Exception:
-                            # Try regular delete if send2trash fails
-                            try:
-                                os.remove(file_path)
-                                result["total_size_bytes"] += size
-                                result["total_count"] += 1
-                                
-                                if callback:
-                                    callback(file_path)
-                            except (PermissionError, FileNotFoundError, OSError):
-                                # Skip files that can't be removed
-                                continue
-                except (PermissionError, FileNotFoundError):
-                    # Skip files that can't be accessed
+                    # A single lstat tells both the file type and its size
+                    st = os.lstat(file_path)
+                except OSError:
+                    # Skip files that can't be accessed (missing, no permission, bad path...)
                     continue
-        # Otherwise, find and clean large files in the directory
+                
+                # Only remove regular files (not symbolic links or directories)
+                if stat.S_ISREG(st.st_mode):
+                    files.append((file_path, st.st_size))
+        # Otherwise, find large files in the directory
         else:
-            for dirpath, _, filenames in os.walk(directory):
-                for filename in filenames:
-                    try:
-                        file_path = os.path.join(dirpath, filename)
-                        if os.path.islink(file_path):
-                            continue
-                        
-                        # Check if file is large enough
-                        size = get_file_size(file_path)
-                        if size >= min_size_bytes:
-                            # Remove the file
-                            try:
-                                send2trash(file_path)
-                                result["total_size_bytes"] += size
-                                result["total_count"] += 1
-                                
-                                if callback:
-                                    callback(file_path)
-                            except Exception:
-                                # Try regular delete if send2trash fails
-                                try:
-                                    os.remove(file_path)
-                                    result["total_size_bytes"] += size
-                                    result["total_count"] += 1
-                                    
-                                    if callback:
-                                        callback(file_path)
-                                except (PermissionError, FileNotFoundError, OSError):
-                                    # Skip files that can't be removed
-                                    continue
-                    except (PermissionError, FileNotFoundError):
-                        # Skip files that can't be accessed
-                        continue
+            files = [(file_path, st.st_size) for file_path, st in iter_files(directory)
+                     if st.st_size >= min_size_bytes]
+        
+        # Remove the files
+        remove_files(files, result, callback, permanent)
     except (PermissionError, FileNotFoundError, OSError) as e:
         result["success"] = False
         result["error"] = str(e)
@@ -232,3 +193,95 @@ def clean_large_files(directory: str, min_size_bytes: int = 100 * 1024 * 1024,
     result["total_size"] = format_size(result["total_size_bytes"])
     
     return result
+
+
+def remove_files(files: List[Tuple[str, int]], result: Dict[str, any], callback: Callable = None,
+                 permanent: bool = False):
+    """
+    Remove files, sending them to the trash in batches unless permanent is set.
+    
+    Files that can't be sent to the trash are deleted instead. Each removed file
+    is added to the result's total size and count and reported to the callback.
+    
+    Args:
+        files: List of (file path, size in bytes) tuples
+        result: Cleaning result dictionary to update
+        callback: Optional callback function to report progress
+        permanent: Delete files permanently instead of sending them to the trash
+    """
+    def record(file_path, size):
+        result["total_size_bytes"] += size
+        result["total_count"] += 1
+        
+        if callback:
+            callback(file_path)
+    
+    if permanent:
+        _delete_files(files, record)
+        return
+    
+    for start in range(0, len(files), TRASH_BATCH_SIZE):
+        batch = files[start:start + TRASH_BATCH_SIZE]
+        
+        # Note which files exist beforehand, so a failed batch doesn't count
+        # files that were already gone (or removed by another process)
+        existing = {file_path for file_path, _ in batch if os.path.lexists(file_path)}
+        try:
+            # Directories may be cleaned concurrently, so files are trashed one batch at a time
+            with TRASH_LOCK:
+                send2trash([file_path for file_path, _ in batch])
+        except Exception:
+            # Part of the batch may already be in the trash, so retry
+            # the remaining files one at a time
+            failed = []
+            for file_path, size in batch:
+                if file_path not in existing:
+                    continue
+                
+                if not os.path.lexists(file_path):
+                    record(file_path, size)
+                    continue
+                
+                try:
+                    with TRASH_LOCK:
+                        send2trash(file_path)
+                    record(file_path, size)
+                except Exception:
+                    failed.append((file_path, size))
+            
+            # Try regular delete if send2trash fails
+            _delete_files(failed, record)
+            continue
+        
+        for file_path, size in batch:
+            record(file_path, size)
+
+
+def _delete_files(files: List[Tuple[str, int]], record: Callable):
+    """
+    Permanently delete files using a thread pool.
+    
+    Args:
+        files: List of (file path, size in bytes) tuples
+        record: Function called with (file path, size) for each deleted file
+    """
+    if not files:
+        return
+    
+    def delete(file_path):
+        try:
+            os.remove(file_path)
+            return True
+        except (PermissionError, FileNotFoundError, OSError):
+            # Skip files that can't be removed
+            return False
+    
+    # Unlinking releases the GIL, so threads can delete files concurrently;
+    # rotational disks are seek-bound, so the pool is sized by device
+    workers, _, _ = get_device_profile(os.path.dirname(files[0][0]))
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        deleted = executor.map(delete, [file_path for file_path, _ in files])
+        for (file_path, size), success in zip(files, deleted):
+            if success:
+                record(file_path, size)
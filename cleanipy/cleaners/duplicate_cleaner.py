@@ -2,184 +2,451 @@
 Duplicate file cleaning functionality.
 """
 import os
+import platform
 import shutil
-from typing import List, Dict, Callable
+import subprocess
+import sys
+import threading
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from functools import partial
+from operator import itemgetter
+from typing import List, Dict, Callable, Generator, NamedTuple, Tuple
 
 from send2trash import send2trash
 
 from cleanipy.analyzers.duplicate_analyzer import find_duplicate_files_by_content
+from cleanipy.utils.device import get_device_profile
+from cleanipy.utils.fast_stat import get_mtime
+from cleanipy.utils.file_utils import TRASH_LOCK
 from cleanipy.utils.size_utils import format_size
 
 
-def clean_duplicate_files(directory: str, duplicates: Dict[str, List[Dict[str, any]]] = None, 
-                         keep_newest: bool = True, callback: Callable = None) -> Dict[str, any]:
+# Suffix of the temporary link created while replacing a duplicate
+TEMP_LINK_SUFFIX = ".cleanipy.tmp"
+
+# Ways of picking the file to keep in each set of duplicates
+SORT_ORDERS = ("mtime", "path", "none")
+
+# Number of files passed to each `gio trash` call
+GIO_TRASH_BATCH_SIZE = 500
+
+
+class CleanDetail(NamedTuple):
+    """Outcome of removing a duplicate file."""
+    path: str
+    size_bytes: int
+    success: bool
+    error: str = None
+
+
+class LinkDetail(NamedTuple):
+    """Outcome of replacing a duplicate file with a link."""
+    source: str
+    target: str
+    size_bytes: int
+    success: bool
+    error: str = None
+
+
+def _sort_by_mtime(files: List[Dict[str, any]], newest_first: bool = True) -> List[Dict[str, any]]:
     """
-    Clean duplicate files in a directory.
+    Sort duplicate files by modification time.
+    
+    The mtime recorded by the duplicate analyzer is used when available, so
+    only files without one are stat'ed. Files that no longer exist are dropped.
     
     Args:
-        directory: Directory to clean
-        duplicates: Dictionary of duplicate files (if None, will be calculated)
-        keep_newest: Whether to keep the newest file in each duplicate set
-        callback: Optional callback function to report progress
+        files: List of file information dictionaries
+        newest_first: Whether to put the newest (rather than the oldest) file first
         
     Returns:
-        Dictionary with cleaning results
+        Sorted list of file information dictionaries
     """
-    result = {
-        "total_size_bytes": 0,
-        "total_count": 0,
-        "details": []
-    }
+    decorated = []
+    for file_info in files:
+        mtime = file_info.get("mtime")
+        if mtime is None:
+            try:
+                mtime = get_mtime(file_info["path"])
+            except OSError:
+                continue
+        decorated.append((mtime, file_info))
     
-    # Find duplicate files if not provided
-    if duplicates is None:
-        duplicates = find_duplicate_files_by_content(directory)
+    decorated.sort(key=itemgetter(0), reverse=newest_first)
+    return [file_info for _, file_info in decorated]
+
+
+def _iter_targets(duplicates: Dict[str, List[Dict[str, any]]], keep_newest: bool, absolute_source: bool = False,
+                  sort_by: str = "mtime") -> Generator[Tuple[str, Dict[str, any]], None, None]:
+    """
+    Pick the file to keep in each set of duplicates and yield the others.
     
-    # Clean each set of duplicates
-    for hash_val, files in duplicates.items():
-        # Sort files by modification time (newest first)
-        files_sorted = sorted(files, key=lambda x: os.path.getmtime(x["path"]), reverse=True)
+    Args:
+        duplicates: Dictionary of duplicate files
+        keep_newest: Whether to keep the newest (rather than the oldest) file in each set
+        absolute_source: Whether to make the path of the file being kept absolute
+        sort_by: How to pick the file to keep (see clean_duplicate_files)
         
-        # Keep the first file (newest or oldest based on keep_newest)
-        files_to_remove = files_sorted[1:] if keep_newest else files_sorted[:-1]
+    Yields:
+        Tuples of (file being kept, file information of a duplicate to process)
+    """
+    if sort_by not in SORT_ORDERS:
+        raise ValueError(f"Unknown sort order: {sort_by}")
+    
+    for files in duplicates.values():
+        # Nothing to do for sets without duplicates, so don't stat them
+        if len(files) < 2:
+            continue
         
-        # Remove duplicate files
-        for file_info in files_to_remove:
-            file_path = file_info["path"]
-            try:
-                # Try to use send2trash for safety
-                send2trash(file_path)
-                result["total_size_bytes"] += file_info["size_bytes"]
-                result["total_count"] += 1
-                
-                # Add to details
-                result["details"].append({
-                    "path": file_path,
-                    "size_bytes": file_info["size_bytes"],
-                    "size": file_info["size"],
-                    "success": True
-                })
-                
-                if callback:
-                    callback(file_path)
-            except Exception:
-                # Try regular delete if send2trash fails
+        if sort_by == "mtime":
+            # Sort files so the one to keep comes first (newest or oldest based on
+            # keep_newest); files that have disappeared are dropped, which may leave nothing to do
+            files_sorted = _sort_by_mtime(files, newest_first=keep_newest)
+            if len(files_sorted) < 2:
+                continue
+        elif sort_by == "path":
+            files_sorted = sorted(files, key=itemgetter("path"))
+        else:
+            files_sorted = files
+        
+        # Keep the first file
+        source_file = files_sorted[0]["path"]
+        if absolute_source:
+            # Resolved once per set rather than once per duplicate
+            source_file = os.path.abspath(source_file)
+        
+        for file_info in files_sorted[1:]:
+            yield source_file, file_info
+
+
+def _find_gio() -> str:
+    """
+    Find the GIO command line tool, which can trash many files per call.
+    
+    Returns:
+        Path to gio, or None if it isn't available (it's only used on Linux)
+    """
+    if platform.system() != "Linux":
+        return None
+    return shutil.which("gio")
+
+
+def _gio_trash(file_paths: List[str]) -> List[str]:
+    """
+    Move files to the trash with `gio trash`, in batches.
+    
+    Args:
+        file_paths: List of files to trash
+        
+    Returns:
+        List of files that are still in place
+    """
+    gio = _find_gio()
+    if gio is None:
+        return list(file_paths)
+    
+    remaining = []
+    for i in range(0, len(file_paths), GIO_TRASH_BATCH_SIZE):
+        batch = file_paths[i:i + GIO_TRASH_BATCH_SIZE]
+        try:
+            subprocess.run([gio, "trash", "--"] + batch, check=False,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except (OSError, subprocess.SubprocessError):
+            remaining.extend(batch)
+            continue
+        
+        # Checking which files are still there is more reliable than parsing gio's errors
+        remaining.extend(file_path for file_path in batch if os.path.lexists(file_path))
+    
+    return remaining
+
+
+def _remove_duplicate(source_file: str, file_info: Dict[str, any]) -> CleanDetail:
+    """
+    Move a duplicate file to the trash, or delete it if that fails.
+    
+    Args:
+        source_file: File being kept (unused)
+        file_info: Information about the file to remove
+        
+    Returns:
+        Detail record for the file
+    """
+    file_path = file_info["path"]
+    error = None
+    
+    # Try to use send2trash for safety (one file at a time, see TRASH_LOCK)
+    with suppress(Exception):
+        with TRASH_LOCK:
+            send2trash(file_path)
+        return CleanDetail(file_path, file_info["size_bytes"], True)
+    
+    # Try regular delete if send2trash fails
+    try:
+        os.remove(file_path)
+    except OSError as e:
+        error = str(e)
+    
+    return CleanDetail(file_path, file_info["size_bytes"], error is None, error)
+
+
+class _LinkSources:
+    """
+    Open handles to the files being kept, so hard links to them can be created
+    without resolving the source path every time (Linux only).
+    
+    Work is grouped by directory, so a source is mostly used in a burst.
+    Only the most recently used handles are kept open, which keeps runs with
+    many duplicate sets well below the open file limit.
+    """
+    
+    # Maximum number of source handles kept open (handles in use by a link
+    # are never closed, so there can briefly be one more per thread)
+    MAX_OPEN = 64
+    
+    def __init__(self):
+        # Source path -> [fd, number of links using it], least recently used first
+        self._fds = OrderedDict()
+        self._lock = threading.Lock()
+        
+        # Links are made through /proc/self/fd, which points straight at the
+        # open file (unlike linkat with AT_EMPTY_PATH, this needs no privileges)
+        self._proc_fd = None
+        if sys.platform == "linux" and hasattr(os, "O_PATH"):
+            with suppress(OSError):
+                self._proc_fd = os.open("/proc", os.O_RDONLY | os.O_DIRECTORY)
+    
+    def _acquire(self, source_file: str) -> list:
+        with self._lock:
+            entry = self._fds.get(source_file)
+            if entry is None:
+                fd = None
+                if self._proc_fd is not None:
+                    with suppress(OSError):
+                        fd = os.open(source_file, os.O_PATH)
+                entry = self._fds[source_file] = [fd, 0]
+            else:
+                self._fds.move_to_end(source_file)
+            entry[1] += 1
+            
+            # Close the least recently used handles that no link is using
+            for path in list(self._fds):
+                if len(self._fds) <= self.MAX_OPEN:
+                    break
+                fd, users = self._fds[path]
+                if users == 0:
+                    del self._fds[path]
+                    if fd is not None:
+                        os.close(fd)
+            
+            return entry
+    
+    def _release(self, entry: list):
+        with self._lock:
+            entry[1] -= 1
+    
+    def link(self, source_file: str, link_path: str):
+        """
+        Create a hard link to a file.
+        
+        Args:
+            source_file: File to link to
+            link_path: Path of the new link
+        """
+        entry = self._acquire(source_file)
+        try:
+            fd = entry[0]
+            if fd is not None:
                 try:
-                    os.remove(file_path)
-                    result["total_size_bytes"] += file_info["size_bytes"]
-                    result["total_count"] += 1
-                    
-                    # Add to details
-                    result["details"].append({
-                        "path": file_path,
-                        "size_bytes": file_info["size_bytes"],
-                        "size": file_info["size"],
-                        "success": True
-                    })
-                    
-                    if callback:
-                        callback(file_path)
-                except (PermissionError, FileNotFoundError, OSError) as e:
-                    # Add to details with error
-                    result["details"].append({
-                        "path": file_path,
-                        "size_bytes": file_info["size_bytes"],
-                        "size": file_info["size"],
-                        "success": False,
-                        "error": str(e)
-                    })
+                    # Passing a directory fd makes os.link use linkat(AT_SYMLINK_FOLLOW),
+                    # which links the file the proc entry points to
+                    os.link(f"self/fd/{fd}", link_path, src_dir_fd=self._proc_fd, follow_symlinks=True)
+                    return
+                except OSError:
+                    pass
+            os.link(source_file, link_path)
+        finally:
+            self._release(entry)
     
-    # Add formatted total size
-    result["total_size"] = format_size(result["total_size_bytes"])
+    def close(self):
+        """Close the open handles."""
+        for fd, _ in self._fds.values():
+            if fd is not None:
+                os.close(fd)
+        self._fds.clear()
+        
+        if self._proc_fd is not None:
+            os.close(self._proc_fd)
+            self._proc_fd = None
     
-    return result
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *args):
+        self.close()
 
 
-def replace_duplicates_with_hardlinks(directory: str, duplicates: Dict[str, List[Dict[str, any]]] = None,
-                                     keep_newest: bool = True, callback: Callable = None) -> Dict[str, any]:
+def _atomic_relink(source_file: str, target_file: str, symlink: bool = False, link: Callable = os.link):
     """
-    Replace duplicate files with hard links to save space.
+    Replace a file with a link to another file.
+    
+    The link is created under a temporary name and renamed over the target,
+    so the target is never missing if the process is interrupted.
     
     Args:
-        directory: Directory to process
-        duplicates: Dictionary of duplicate files (if None, will be calculated)
-        keep_newest: Whether to keep the newest file as the source for hard links
-        callback: Optional callback function to report progress
+        source_file: File to link to
+        target_file: File to replace
+        symlink: Whether to create a symbolic (rather than hard) link
+        link: Function used to create hard links
+    """
+    temp_file = target_file + TEMP_LINK_SUFFIX
+    if symlink:
+        os.symlink(source_file, temp_file)
+    else:
+        link(source_file, temp_file)
+    
+    try:
+        os.replace(temp_file, target_file)
+        
+        # Renaming a hard link over another link to the same file does nothing,
+        # which leaves the temporary link behind
+        if not symlink:
+            with suppress(FileNotFoundError):
+                os.remove(temp_file)
+    except OSError:
+        with suppress(OSError):
+            os.remove(temp_file)
+        raise
+
+
+def _hardlink_duplicate(source_file: str, file_info: Dict[str, any], link: Callable = os.link) -> LinkDetail:
+    """
+    Replace a duplicate file with a hard link to the source file.
+    
+    Args:
+        source_file: File to link to
+        file_info: Information about the file to replace
+        link: Function used to create the hard link
         
     Returns:
-        Dictionary with results
+        Detail record for the file
     """
-    result = {
-        "total_size_bytes": 0,
-        "total_count": 0,
-        "details": []
-    }
+    target_file = file_info["path"]
+    try:
+        # Replace the target file with a hard link
+        _atomic_relink(source_file, target_file, link=link)
+    except OSError as e:
+        return LinkDetail(source_file, target_file, file_info["size_bytes"], False, str(e))
+    
+    return LinkDetail(source_file, target_file, file_info["size_bytes"], True)
+
+
+def _symlink_duplicate(source_file: str, file_info: Dict[str, any]) -> LinkDetail:
+    """
+    Replace a duplicate file with a symbolic link to the source file.
+    
+    Args:
+        source_file: Absolute path of the file to link to
+        file_info: Information about the file to replace
+        
+    Returns:
+        Detail record for the file
+    """
+    target_file = file_info["path"]
+    try:
+        # Replace the target file with a symbolic link
+        _atomic_relink(source_file, target_file, symlink=True)
+    except OSError as e:
+        return LinkDetail(source_file, target_file, file_info["size_bytes"], False, str(e))
+    
+    return LinkDetail(source_file, target_file, file_info["size_bytes"], True)
+
+
+def _iter_duplicate_actions(directory: str, duplicates: Dict[str, List[Dict[str, any]]], action: Callable,
+                            keep_newest: bool, io_threads: int = None, absolute_source: bool = False,
+                            batch_trash: bool = False,
+                            sort_by: str = "mtime") -> Generator[Tuple[Dict[str, any], Tuple], None, None]:
+    """
+    Apply an action to every duplicate file, keeping one file in each set.
     
+    All targets are listed before any action is applied (to batch the trash
+    and group them by directory), so memory use is proportional to the
+    number of duplicates.
+    
+    Args:
+        directory: Directory being processed
+        duplicates: Dictionary of duplicate files (if None, will be calculated)
+        action: Function called with (file being kept, file information) that returns a detail record
+        keep_newest: Whether to keep the newest (rather than the oldest) file in each set
+        io_threads: Number of threads to use (default: chosen from the device)
+        absolute_source: Whether to pass the action the absolute path of the file being kept
+        batch_trash: Whether to try trashing all the duplicates with gio before applying the action
+        sort_by: How to pick the file to keep (see clean_duplicate_files)
+        
+    Yields:
+        Tuples of (file information, detail record), grouped by directory
+    """
     # Find duplicate files if not provided
     if duplicates is None:
         duplicates = find_duplicate_files_by_content(directory)
     
-    # Process each set of duplicates
-    for hash_val, files in duplicates.items():
-        # Sort files by modification time (newest first)
-        files_sorted = sorted(files, key=lambda x: os.path.getmtime(x["path"]), reverse=True)
-        
-        # Use the first file as the source (newest or oldest based on keep_newest)
-        source_file = files_sorted[0]["path"] if keep_newest else files_sorted[-1]["path"]
-        
-        # Replace duplicates with hard links
-        files_to_link = files_sorted[1:] if keep_newest else files_sorted[:-1]
-        
-        for file_info in files_to_link:
-            target_file = file_info["path"]
-            try:
-                # Remove the target file
-                os.remove(target_file)
-                
-                # Create a hard link
-                os.link(source_file, target_file)
-                
-                result["total_size_bytes"] += file_info["size_bytes"]
-                result["total_count"] += 1
-                
-                # Add to details
-                result["details"].append({
-                    "source": source_file,
-                    "target": target_file,
-                    "size_bytes": file_info["size_bytes"],
-                    "size": file_info["size"],
-                    "success": True
-                })
-                
-                if callback:
-                    callback(target_file)
-            except (PermissionError, FileNotFoundError, OSError) as e:
-                # Add to details with error
-                result["details"].append({
-                    "source": source_file,
-                    "target": target_file,
-                    "size_bytes": file_info["size_bytes"],
-                    "size": file_info["size"],
-                    "success": False,
-                    "error": str(e)
-                })
+    work = list(_iter_targets(duplicates, keep_newest, absolute_source, sort_by))
+    if not work:
+        return
     
-    # Add formatted total size
-    result["total_size"] = format_size(result["total_size_bytes"])
+    # Files trashed in bulk are done; the action is only applied to the rest
+    trashed = set()
+    if batch_trash:
+        file_paths = [file_info["path"] for _, file_info in work]
+        trashed = set(file_paths).difference(_gio_trash(file_paths))
     
-    return result
+    # Group the remaining files by directory, so siblings are handled back to
+    # back by one thread: the directory stays in the dentry cache and threads
+    # don't contend for its lock
+    by_directory = defaultdict(list)
+    for source_file, file_info in work:
+        if file_info["path"] in trashed:
+            yield file_info, CleanDetail(file_info["path"], file_info["size_bytes"], True)
+        else:
+            by_directory[os.path.dirname(file_info["path"])].append((source_file, file_info))
+    groups = [by_directory[dirname] for dirname in sorted(by_directory)]
+    
+    if not groups:
+        return
+    
+    if io_threads is None:
+        io_threads, _, _ = get_device_profile(directory)
+    
+    def process(items):
+        return [action(*item) for item in items]
+    
+    # The syscalls release the GIL, so directories are processed concurrently; results
+    # come back in order, and directories not reached yet are skipped if the caller stops early
+    with ThreadPoolExecutor(max_workers=io_threads) as executor:
+        for items, details in zip(groups, executor.map(process, groups)):
+            for (_, file_info), detail in zip(items, details):
+                yield file_info, detail
 
 
-def replace_duplicates_with_symlinks(directory: str, duplicates: Dict[str, List[Dict[str, any]]] = None,
-                                    keep_newest: bool = True, callback: Callable = None) -> Dict[str, any]:
+def _process_duplicate_groups(directory: str, duplicates: Dict[str, List[Dict[str, any]]], action: Callable,
+                              keep_newest: bool, callback: Callable = None, io_threads: int = None,
+                              absolute_source: bool = False, batch_trash: bool = False,
+                              sort_by: str = "mtime") -> Dict[str, any]:
     """
-    Replace duplicate files with symbolic links to save space.
+    Apply an action to every duplicate file and collect the results.
     
     Args:
-        directory: Directory to process
+        directory: Directory being processed
         duplicates: Dictionary of duplicate files (if None, will be calculated)
-        keep_newest: Whether to keep the newest file as the source for symbolic links
+        action: Function called with (file being kept, file information) that returns a detail record
+        keep_newest: Whether to keep the newest (rather than the oldest) file in each set
         callback: Optional callback function to report progress
+        io_threads: Number of threads to use (default: chosen from the device)
+        absolute_source: Whether to pass the action the absolute path of the file being kept
+        batch_trash: Whether to try trashing all the duplicates with gio before applying the action
+        sort_by: How to pick the file to keep (see clean_duplicate_files)
         
     Returns:
         Dictionary with results
@@ -190,56 +457,119 @@ def replace_duplicates_with_symlinks(directory: str, duplicates: Dict[str, List[
         "details": []
     }
     
-    # Find duplicate files if not provided
-    if duplicates is None:
-        duplicates = find_duplicate_files_by_content(directory)
-    
-    # Process each set of duplicates
-    for hash_val, files in duplicates.items():
-        # Sort files by modification time (newest first)
-        files_sorted = sorted(files, key=lambda x: os.path.getmtime(x["path"]), reverse=True)
+    # Results are recorded here, so the callback needn't be thread-safe
+    for file_info, detail in _iter_duplicate_actions(directory, duplicates, action, keep_newest,
+                                                     io_threads, absolute_source, batch_trash, sort_by):
+        if detail.success:
+            result["total_size_bytes"] += file_info["size_bytes"]
+            result["total_count"] += 1
+            
+            if callback:
+                callback(file_info["path"])
         
-        # Use the first file as the source (newest or oldest based on keep_newest)
-        source_file = files_sorted[0]["path"] if keep_newest else files_sorted[-1]["path"]
-        
-        # Replace duplicates with symbolic links
-        files_to_link = files_sorted[1:] if keep_newest else files_sorted[:-1]
-        
-        for file_info in files_to_link:
-            target_file = file_info["path"]
-            try:
-                # Remove the target file
-                os.remove(target_file)
-                
-                # Create a symbolic link
-                os.symlink(os.path.abspath(source_file), target_file)
-                
-                result["total_size_bytes"] += file_info["size_bytes"]
-                result["total_count"] += 1
-                
-                # Add to details
-                result["details"].append({
-                    "source": source_file,
-                    "target": target_file,
-                    "size_bytes": file_info["size_bytes"],
-                    "size": file_info["size"],
-                    "success": True
-                })
-                
-                if callback:
-                    callback(target_file)
-            except (PermissionError, FileNotFoundError, OSError) as e:
-                # Add to details with error
-                result["details"].append({
-                    "source": source_file,
-                    "target": target_file,
-                    "size_bytes": file_info["size_bytes"],
-                    "size": file_info["size"],
-                    "success": False,
-                    "error": str(e)
-                })
+        # Add to details
+        result["details"].append(detail)
     
     # Add formatted total size
     result["total_size"] = format_size(result["total_size_bytes"])
     
     return result
+
+
+def iter_clean_duplicate_files(directory: str, duplicates: Dict[str, List[Dict[str, any]]] = None,
+                               keep_newest: bool = True, io_threads: int = None,
+                               sort_by: str = "mtime") -> Generator[CleanDetail, None, None]:
+    """
+    Clean duplicate files in a directory, yielding the outcome for each file.
+    
+    Unlike clean_duplicate_files, the detail records aren't collected. The
+    duplicates are still listed up front (so they can be trashed in one batch
+    and grouped by directory), so memory use grows with their number, just
+    by less per file. If the caller stops early, duplicates that are still
+    queued are left in place.
+    
+    Args:
+        directory: Directory to clean
+        duplicates: Dictionary of duplicate files (if None, will be calculated)
+        keep_newest: Whether to keep the newest file in each duplicate set
+        io_threads: Number of threads used to remove files (default: chosen from the device)
+        sort_by: How to pick the file to keep (see clean_duplicate_files)
+        
+    Yields:
+        CleanDetail record for each duplicate file
+    """
+    for _, detail in _iter_duplicate_actions(directory, duplicates, _remove_duplicate, keep_newest,
+                                             io_threads, batch_trash=True, sort_by=sort_by):
+        yield detail
+
+
+def clean_duplicate_files(directory: str, duplicates: Dict[str, List[Dict[str, any]]] = None, 
+                         keep_newest: bool = True, callback: Callable = None,
+                         io_threads: int = None, sort_by: str = "mtime") -> Dict[str, any]:
+    """
+    Clean duplicate files in a directory.
+    
+    Duplicates are moved to the trash, in batches with `gio trash` where it's
+    available, and deleted if that fails.
+    
+    Args:
+        directory: Directory to clean
+        duplicates: Dictionary of duplicate files (if None, will be calculated)
+        keep_newest: Whether to keep the newest file in each duplicate set
+        callback: Optional callback function to report progress
+        io_threads: Number of threads used to remove files (default: chosen from the device)
+        sort_by: How to pick the file to keep: "mtime" keeps the newest or oldest
+            file (see keep_newest), "path" keeps the first file by path and "none"
+            keeps the first file listed. Only "mtime" may need to stat files, so
+            the others are faster when it doesn't matter which copy is kept.
+        
+    Returns:
+        Dictionary with cleaning results (details are CleanDetail records)
+    """
+    return _process_duplicate_groups(directory, duplicates, _remove_duplicate, keep_newest, callback, io_threads,
+                                     batch_trash=True, sort_by=sort_by)
+
+
+def replace_duplicates_with_hardlinks(directory: str, duplicates: Dict[str, List[Dict[str, any]]] = None,
+                                     keep_newest: bool = True, callback: Callable = None,
+                                     io_threads: int = None, sort_by: str = "mtime") -> Dict[str, any]:
+    """
+    Replace duplicate files with hard links to save space.
+    
+    Args:
+        directory: Directory to process
+        duplicates: Dictionary of duplicate files (if None, will be calculated)
+        keep_newest: Whether to keep the newest file as the source for hard links
+        callback: Optional callback function to report progress
+        io_threads: Number of threads used to replace files (default: chosen from the device)
+        sort_by: How to pick the source file (see clean_duplicate_files)
+        
+    Returns:
+        Dictionary with results (details are LinkDetail records)
+    """
+    # Each source is opened once and shared by the links to it
+    with _LinkSources() as sources:
+        action = partial(_hardlink_duplicate, link=sources.link)
+        return _process_duplicate_groups(directory, duplicates, action, keep_newest, callback, io_threads,
+                                         sort_by=sort_by)
+
+
+def replace_duplicates_with_symlinks(directory: str, duplicates: Dict[str, List[Dict[str, any]]] = None,
+                                    keep_newest: bool = True, callback: Callable = None,
+                                    io_threads: int = None, sort_by: str = "mtime") -> Dict[str, any]:
+    """
+    Replace duplicate files with symbolic links to save space.
+    
+    Args:
+        directory: Directory to process
+        duplicates: Dictionary of duplicate files (if None, will be calculated)
+        keep_newest: Whether to keep the newest file as the source for symbolic links
+        callback: Optional callback function to report progress
+        io_threads: Number of threads used to replace files (default: chosen from the device)
+        sort_by: How to pick the source file (see clean_duplicate_files)
+        
+    Returns:
+        Dictionary with results (details are LinkDetail records)
+    """
+    return _process_duplicate_groups(directory, duplicates, _symlink_duplicate, keep_newest, callback, io_threads,
+                                     absolute_source=True, sort_by=sort_by)
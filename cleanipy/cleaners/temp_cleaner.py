@@ -4,6 +4,8 @@ Temporary file cleaning functionality.
 import os
 import platform
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Callable
 
 from cleanipy.analyzers.temp_analyzer import (
@@ -12,15 +14,59 @@ from cleanipy.analyzers.temp_analyzer import (
     get_package_cache_dirs
 )
 from cleanipy.cleaners.disk_cleaner import clean_directory, clean_old_files
+from cleanipy.utils.size_utils import format_size
 
 
-def clean_system_temp_files(min_age_days: int = 7, callback: Callable = None) -> Dict[str, any]:
+# Package managers that can clean their own caches:
+# (platform, cache directory marker, command name, command)
+PACKAGE_CLEAN_COMMANDS = [
+    ("Linux", "apt", "apt-get clean", ["sudo", "apt-get", "clean"]),
+    ("Linux", "pacman", "pacman -Sc", ["sudo", "pacman", "-Sc", "--noconfirm"]),
+    ("Linux", "yum", "yum clean all", ["sudo", "yum", "clean", "all"]),
+    ("Darwin", "Homebrew", "brew cleanup", ["brew", "cleanup"])
+]
+
+# Maximum number of directories cleaned at the same time
+CLEAN_WORKERS = 8
+
+
+def _clean_directories(directories: List[str], clean: Callable, callback: Callable = None) -> List[Dict[str, any]]:
+    """
+    Clean independent directories concurrently.
+    
+    Args:
+        directories: List of directories to clean
+        clean: Function called with (directory, callback) that returns a cleaning result
+        callback: Optional callback function to report progress
+        
+    Returns:
+        List of cleaning results, in the same order as directories
+    """
+    if len(directories) < 2:
+        return [clean(directory, callback) for directory in directories]
+    
+    # The callback isn't assumed to be thread-safe, so calls to it are serialized
+    if callback:
+        lock = threading.Lock()
+        report = callback
+        
+        def callback(*args):
+            with lock:
+                report(*args)
+    
+    with ThreadPoolExecutor(max_workers=min(CLEAN_WORKERS, len(directories))) as executor:
+        return list(executor.map(lambda directory: clean(directory, callback), directories))
+
+
+def clean_system_temp_files(min_age_days: int = 7, callback: Callable = None,
+                            permanent: bool = False) -> Dict[str, any]:
     """
     Clean system temporary files.
     
     Args:
         min_age_days: Minimum age of files in days to remove
         callback: Optional callback function to report progress
+        permanent: Delete files permanently instead of sending them to the trash
         
     Returns:
         Dictionary with cleaning results
@@ -34,28 +80,29 @@ def clean_system_temp_files(min_age_days: int = 7, callback: Callable = None) ->
     # Get system temp directories
     temp_dirs = get_system_temp_dirs()
     
-    # Clean each directory
-    for temp_dir in temp_dirs:
-        # Clean old files instead of entire directory to avoid removing important files
-        clean_result = clean_old_files(temp_dir, min_age_days, callback)
-        
+    # Clean old files instead of entire directories to avoid removing important files
+    clean_results = _clean_directories(
+        temp_dirs, lambda temp_dir, cb: clean_old_files(temp_dir, min_age_days, cb, permanent), callback
+    )
+    
+    for clean_result in clean_results:
         result["total_size_bytes"] += clean_result["total_size_bytes"]
         result["total_count"] += clean_result["total_count"]
         result["details"].append(clean_result)
     
     # Add formatted total size
-    from cleanipy.utils.size_utils import format_size
     result["total_size"] = format_size(result["total_size_bytes"])
     
     return result
 
 
-def clean_browser_caches(callback: Callable = None) -> Dict[str, any]:
+def clean_browser_caches(callback: Callable = None, permanent: bool = False) -> Dict[str, any]:
     """
     Clean browser cache files.
     
     Args:
         callback: Optional callback function to report progress
+        permanent: Delete files permanently instead of sending them to the trash
         
     Returns:
         Dictionary with cleaning results
@@ -69,17 +116,17 @@ def clean_browser_caches(callback: Callable = None) -> Dict[str, any]:
     # Get browser cache directories
     cache_dirs = get_browser_cache_dirs()
     
-    # Clean each directory
-    for cache_dir in cache_dirs:
-        # For browser caches, we can safely clean old files
-        clean_result = clean_old_files(cache_dir, 1, callback)
-        
+    # For browser caches, we can safely clean old files
+    clean_results = _clean_directories(
+        cache_dirs, lambda cache_dir, cb: clean_old_files(cache_dir, 1, cb, permanent), callback
+    )
+    
+    for clean_result in clean_results:
         result["total_size_bytes"] += clean_result["total_size_bytes"]
         result["total_count"] += clean_result["total_count"]
         result["details"].append(clean_result)
     
     # Add formatted total size
-    from cleanipy.utils.size_utils import format_size
     result["total_size"] = format_size(result["total_size_bytes"])
     
     return result
@@ -89,6 +136,9 @@ def clean_package_caches(callback: Callable = None) -> Dict[str, any]:
     """
     Clean package manager cache files.
     
+    Caches cleaned by their package manager don't report what was removed;
+    their details have size_known set to False and count as 0 in the totals.
+    
     Args:
         callback: Optional callback function to report progress
         
@@ -104,90 +154,63 @@ def clean_package_caches(callback: Callable = None) -> Dict[str, any]:
     # Get package cache directories
     cache_dirs = get_package_cache_dirs()
     
-    # Clean each directory
+    # The package managers clean all of their caches at once, so each
+    # command only needs to run once however many of its directories exist
+    system = platform.system()
+    ran_commands = {}
+    
+    # Package manager commands run one at a time; the remaining directories
+    # are cleaned directly afterwards, concurrently
+    clean_results = []
+    to_clean = []
+    
     for cache_dir in cache_dirs:
         # For package caches, we need to be careful
         # Use OS-specific commands for some package managers
-        system = platform.system()
+        command = None
+        for command_system, marker, name, args in PACKAGE_CLEAN_COMMANDS:
+            if command_system == system and marker in cache_dir:
+                command = (name, args)
+                break
         
-        if system == "Linux":
-            # For apt
-            if "apt" in cache_dir:
-                try:
-                    # Try to use apt-get clean
-                    subprocess.run(["sudo", "apt-get", "clean"], check=False)
-                    # Calculate cleaned size (approximate)
-                    clean_result = {
-                        "directory": cache_dir,
-                        "success": True,
-                        "total_size": "Unknown (used apt-get clean)",
-                        "total_count": 0
-                    }
-                except Exception:
-                    # Fall back to regular cleaning
-                    clean_result = clean_directory(cache_dir, callback)
-            # For pacman
-            elif "pacman" in cache_dir:
-                try:
-                    # Try to use pacman -Sc
-                    subprocess.run(["sudo", "pacman", "-Sc", "--noconfirm"], check=False)
-                    # Calculate cleaned size (approximate)
-                    clean_result = {
-                        "directory": cache_dir,
-                        "success": True,
-                        "total_size": "Unknown (used pacman -Sc)",
-                        "total_count": 0
-                    }
-                except Exception:
-                    # Fall back to regular cleaning
-                    clean_result = clean_directory(cache_dir, callback)
-            # For yum
-            elif "yum" in cache_dir:
+        if command is not None:
+            name, args = command
+            if name not in ran_commands:
                 try:
-                    # Try to use yum clean
-                    subprocess.run(["sudo", "yum", "clean", "all"], check=False)
-                    # Calculate cleaned size (approximate)
-                    clean_result = {
-                        "directory": cache_dir,
-                        "success": True,
-                        "total_size": "Unknown (used yum clean all)",
-                        "total_count": 0
-                    }
+                    subprocess.run(args, check=False)
+                    ran_commands[name] = True
                 except Exception:
-                    # Fall back to regular cleaning
-                    clean_result = clean_directory(cache_dir, callback)
-            else:
-                # For other caches, clean the directory
-                clean_result = clean_directory(cache_dir, callback)
-        elif system == "Darwin" and "Homebrew" in cache_dir:
-            # For Homebrew on macOS
-            try:
-                # Try to use brew cleanup
-                subprocess.run(["brew", "cleanup"], check=False)
-                # Calculate cleaned size (approximate)
-                clean_result = {
+                    ran_commands[name] = False
+            
+            if ran_commands[name]:
+                # The package manager doesn't report what it removed
+                clean_results.append({
                     "directory": cache_dir,
                     "success": True,
-                    "total_size": "Unknown (used brew cleanup)",
-                    "total_count": 0
-                }
-            except Exception:
-                # Fall back to regular cleaning
-                clean_result = clean_directory(cache_dir, callback)
-        else:
-            # For other caches, clean the directory
-            clean_result = clean_directory(cache_dir, callback)
+                    "total_size_bytes": 0,
+                    "total_count": 0,
+                    "size_known": False,
+                    "total_size": f"Unknown (used {name})"
+                })
+                continue
+        
+        # For other caches (or if the command failed), clean the directory
+        clean_results.append(None)
+        to_clean.append(cache_dir)
+    
+    cleaned = iter(_clean_directories(to_clean, clean_directory, callback))
+    
+    for clean_result in clean_results:
+        if clean_result is None:
+            clean_result = next(cleaned)
         
-        # Add to result if size is known
-        if isinstance(clean_result.get("total_size_bytes"), int):
-            result["total_size_bytes"] += clean_result["total_size_bytes"]
-        if isinstance(clean_result.get("total_count"), int):
-            result["total_count"] += clean_result["total_count"]
+        # Sizes the package managers don't report count as 0
+        result["total_size_bytes"] += clean_result["total_size_bytes"]
+        result["total_count"] += clean_result["total_count"]
         
         result["details"].append(clean_result)
     
     # Add formatted total size
-    from cleanipy.utils.size_utils import format_size
     result["total_size"] = format_size(result["total_size_bytes"])
     
     return result
@@ -3,6 +3,7 @@ CleanIPy - A terminal application to clean and free up storage space.
 """
 import os
 import sys
+import heapq
 import click
 from rich.console import Console
 from rich.progress import Progress
@@ -11,12 +12,14 @@ from rich.table import Table
 from cleanipy.utils.ui import (
     print_header, print_subheader, print_success, print_warning,
     print_error, print_info, confirm_action, display_menu,
-    create_table, display_table, create_progress_bar
+    create_table, display_table, display_table_rows, create_progress_bar,
+    create_progress_callback
 )
-from cleanipy.utils.size_utils import format_size
+from cleanipy.utils.size_utils import format_size, format_sizes_bulk
+from cleanipy.utils.file_utils import DEFAULT_SKIP_DIRS
 
 from cleanipy.analyzers.disk_analyzer import (
-    get_disk_usage, get_directory_tree_size, find_large_files, get_file_types_summary
+    get_disk_usage, scan_directory, get_directory_tree_size, find_large_files, get_file_types_summary
 )
 from cleanipy.analyzers.temp_analyzer import (
     get_system_temp_dirs, get_browser_cache_dirs, get_package_cache_dirs,
@@ -33,7 +36,7 @@ from cleanipy.cleaners.temp_cleaner import (
     clean_system_temp_files, clean_browser_caches, clean_package_caches
 )
 from cleanipy.cleaners.duplicate_cleaner import (
-    clean_duplicate_files, replace_duplicates_with_hardlinks, replace_duplicates_with_symlinks
+    iter_clean_duplicate_files, replace_duplicates_with_hardlinks, replace_duplicates_with_symlinks
 )
 
 
@@ -78,33 +81,42 @@ def analyze_directory():
         print_error(f"Directory '{directory}' does not exist.")
         return
 
+    # Ask whether to leave out dependency, VCS and cache trees
+    skip = None
+    if confirm_action(f"Skip {', '.join(sorted(DEFAULT_SKIP_DIRS))} directories?", default=False):
+        skip = DEFAULT_SKIP_DIRS
+
     # Create progress bar
     with create_progress_bar() as progress:
         task = progress.add_task("Analyzing directory...", total=None)
 
+        # Walk the tree once, all three analyses reuse the result
+        progress.update(task, description="Scanning directory...")
+        scan = scan_directory(directory, skip)
+
         # Get directory tree size
         progress.update(task, description="Analyzing directory sizes...")
-        dir_sizes = get_directory_tree_size(directory, depth=1)
+        dir_sizes = get_directory_tree_size(directory, depth=1, scan=scan)
 
         # Find large files
         progress.update(task, description="Finding large files...")
-        large_files = find_large_files(directory)
+        large_files = find_large_files(directory, limit=20, scan=scan)
 
         # Get file types summary
         progress.update(task, description="Analyzing file types...")
-        file_types = get_file_types_summary(directory)
+        file_types = get_file_types_summary(directory, scan=scan)
 
     # Directory Size Analysis
     print_subheader("Directory Size Analysis")
 
-    # Sort by size (largest first)
-    dir_sizes.sort(key=lambda x: x["size_bytes"], reverse=True)
+    # Keep the 20 largest (largest first) without sorting the whole list
+    largest_dirs = heapq.nlargest(20, dir_sizes, key=lambda x: x["size_bytes"])
 
     # Create table
     table = create_table("Directory Sizes", ["Path", "Size"])
 
-    # Add rows (limit to top 20)
-    for dir_info in dir_sizes[:20]:
+    # Add rows
+    for dir_info in largest_dirs:
         table.add_row(
             dir_info["path"],
             dir_info["size"]
@@ -119,11 +131,11 @@ def analyze_directory():
     # Create table
     table = create_table("Large Files", ["Path", "Size"])
 
-    # Add rows (limit to top 20)
-    for file_info in large_files[:20]:
+    # Add rows (find_large_files already kept the 20 largest)
+    for file_info in large_files:
         table.add_row(
             file_info["path"],
-            file_info["size"]
+            format_size(file_info["size_bytes"])
         )
 
     # Display table
@@ -132,18 +144,18 @@ def analyze_directory():
     # File Types Analysis
     print_subheader("File Types Analysis")
 
-    # Sort by total size (largest first)
-    file_types_sorted = sorted(file_types.items(), key=lambda x: x[1]["total_size_bytes"], reverse=True)
+    # Keep the 20 largest types (largest first) without sorting them all
+    largest_types = heapq.nlargest(20, file_types.items(), key=lambda x: x[1]["total_size_bytes"])
 
     # Create table
     table = create_table("File Types", ["Extension", "Count", "Total Size"])
 
-    # Add rows (limit to top 20)
-    for ext, info in file_types_sorted[:20]:
+    # Add rows
+    for ext, info in largest_types:
         table.add_row(
             ext,
             str(info["count"]),
-            info["total_size"]
+            format_size(info["total_size_bytes"])
         )
 
     # Display table
@@ -260,7 +272,7 @@ def analyze_duplicates():
 
         # Get duplicate sets
         progress.update(task, description="Finding duplicate sets...")
-        duplicate_sets = get_duplicate_sets(directory)
+        duplicate_sets = get_duplicate_sets(directory, duplicates=result["duplicates"])
 
     # Show summary
     print_subheader("Summary")
@@ -285,7 +297,7 @@ def analyze_duplicates():
         for file_info in dup_set["files"]:
             table.add_row(
                 file_info["path"],
-                file_info["size"]
+                format_size(file_info["size_bytes"])
             )
 
         # Display table
@@ -314,13 +326,17 @@ def clean_temp_files():
         print_info("Operation cancelled.")
         return
 
+    # Old temporary and cache files can skip the trash, which is much faster for many files
+    permanent = choice != 2 and confirm_action(
+        "Delete them permanently instead of moving them to the trash?", default=False
+    )
+
     # Create progress bar
     with create_progress_bar() as progress:
         task = progress.add_task("Cleaning files...", total=None)
 
         # Define callback for progress updates
-        def update_progress(file_path):
-            progress.update(task, description=f"Cleaning: {os.path.basename(file_path)}")
+        update_progress = create_progress_callback(progress, task, "Cleaning")
 
         # Clean based on choice
         system_result = None
@@ -329,11 +345,11 @@ def clean_temp_files():
 
         if choice == 0 or choice == 3:  # System temp files or All
             progress.update(task, description="Cleaning system temporary files...")
-            system_result = clean_system_temp_files(callback=update_progress)
+            system_result = clean_system_temp_files(callback=update_progress, permanent=permanent)
 
         if choice == 1 or choice == 3:  # Browser caches or All
             progress.update(task, description="Cleaning browser caches...")
-            browser_result = clean_browser_caches(callback=update_progress)
+            browser_result = clean_browser_caches(callback=update_progress, permanent=permanent)
 
         if choice == 2 or choice == 3:  # Package caches or All
             progress.update(task, description="Cleaning package caches...")
@@ -384,19 +400,13 @@ def clean_large_files_menu():
         print_info(f"No files larger than {min_size_str} found.")
         return
 
-    # Create table
-    table = create_table("Large Files", ["#", "Path", "Size"])
-
-    # Add rows
-    for i, file_info in enumerate(large_files, 1):
-        table.add_row(
-            str(i),
-            file_info["path"],
-            file_info["size"]
-        )
-
-    # Display table
-    display_table(table)
+    # Display table (sizes are formatted in one pass and rows rendered in
+    # chunks, since the list can be long)
+    sizes = format_sizes_bulk([file_info["size_bytes"] for file_info in large_files])
+    display_table_rows("Large Files", ["#", "Path", "Size"], (
+        (str(i), file_info["path"], size)
+        for i, (file_info, size) in enumerate(zip(large_files, sizes), 1)
+    ))
 
     # Ask which files to clean
     print_info("Enter the numbers of files to clean (comma-separated), 'all' to clean all, or 'cancel' to cancel:")
@@ -427,16 +437,18 @@ def clean_large_files_menu():
         print_info("Operation cancelled.")
         return
 
+    permanent = confirm_action("Delete them permanently instead of moving them to the trash?", default=False)
+
     # Create a new progress bar for cleaning files
     with create_progress_bar() as progress:
         task = progress.add_task("Cleaning large files...", total=None)
 
         # Define callback for progress updates
-        def update_progress(file_path):
-            progress.update(task, description=f"Cleaning: {os.path.basename(file_path)}")
+        update_progress = create_progress_callback(progress, task, "Cleaning")
 
         # Clean files
-        result = clean_large_files(directory, file_paths=files_to_clean, callback=update_progress)
+        result = clean_large_files(directory, file_paths=files_to_clean, callback=update_progress,
+                                   permanent=permanent)
 
     print_success(f"Cleaned {result['total_count']} files ({result['total_size']})")
 
@@ -494,16 +506,28 @@ def clean_duplicates():
         task = progress.add_task("Processing duplicate files...", total=None)
 
         # Define callback for progress updates
-        def update_progress(file_path):
-            progress.update(task, description=f"Processing: {os.path.basename(file_path)}")
+        update_progress = create_progress_callback(progress, task, "Processing")
 
         # Clean based on choice
-        if choice == 0:  # Delete (keep newest)
-            progress.update(task, description="Cleaning duplicate files (keeping newest)...")
-            clean_result = clean_duplicate_files(directory, result["duplicates"], keep_newest=True, callback=update_progress)
-        elif choice == 1:  # Delete (keep oldest)
-            progress.update(task, description="Cleaning duplicate files (keeping oldest)...")
-            clean_result = clean_duplicate_files(directory, result["duplicates"], keep_newest=False, callback=update_progress)
+        if choice in (0, 1):  # Delete (keep newest or oldest)
+            keep_newest = choice == 0
+            progress.update(
+                task, description=f"Cleaning duplicate files (keeping {'newest' if keep_newest else 'oldest'})..."
+            )
+
+            # Stream the results, since only the totals are shown
+            total_size_bytes = 0
+            total_count = 0
+            for detail in iter_clean_duplicate_files(directory, result["duplicates"], keep_newest=keep_newest):
+                if detail.success:
+                    total_size_bytes += detail.size_bytes
+                    total_count += 1
+                    update_progress(detail.path)
+
+            clean_result = {
+                "total_count": total_count,
+                "total_size": format_size(total_size_bytes)
+            }
         elif choice == 2:  # Hard links
             progress.update(task, description="Replacing with hard links...")
             clean_result = replace_duplicates_with_hardlinks(directory, result["duplicates"], callback=update_progress)
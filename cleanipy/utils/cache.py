@@ -0,0 +1,178 @@
+"""
+Persistent cache of file hashes shared between runs.
+"""
+import os
+import sqlite3
+import time
+
+from cleanipy.utils.file_utils import HASH_ALGORITHM
+
+
+def get_cache_dir() -> str:
+    """
+    Get the directory where CleanIPy stores its cache.
+
+    Returns:
+        Path to the cache directory ($XDG_CACHE_HOME/cleanipy or ~/.cache/cleanipy)
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "cleanipy")
+
+
+# Version of the table layout; databases with another version are rebuilt
+SCHEMA_VERSION = 2
+
+
+class HashCache:
+    """
+    SQLite-backed cache of file hashes keyed by path and file identity.
+
+    A cached hash is only returned while the file's device, inode, mtime,
+    ctime and size are all unchanged. The ctime can't be set from user space,
+    so a file replaced with one that copies its size and mtime (cp -p,
+    rsync -t, touch -r) still misses the cache. If the database can't be
+    opened the cache silently behaves as empty.
+
+    Entries that no longer match their file are dropped when they are looked
+    up, and entries older than MAX_AGE_DAYS or beyond the newest MAX_ENTRIES
+    are pruned when the cache is closed.
+    """
+
+    # Number of new hashes to collect before writing them to the database
+    BATCH_SIZE = 1000
+
+    # Entries are rehashed after this many days, whether or not they were used
+    MAX_AGE_DAYS = 90
+
+    # Maximum number of entries kept (the most recently hashed ones)
+    MAX_ENTRIES = 1000000
+
+    def __init__(self, db_path: str = None):
+        """
+        Open (and create if needed) the cache database.
+
+        Args:
+            db_path: Path to the database file (default: hashes.db in the cache directory)
+        """
+        if db_path is None:
+            db_path = os.path.join(get_cache_dir(), "hashes.db")
+
+        self.pending = []
+        self.stale = []
+        try:
+            if db_path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self.conn = sqlite3.connect(db_path, isolation_level=None)
+            if self.conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                self.conn.execute("DROP TABLE IF EXISTS files")
+                self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS files ("
+                "path TEXT PRIMARY KEY, dev INTEGER, ino INTEGER, mtime_ns INTEGER, ctime_ns INTEGER, "
+                "size INTEGER, algorithm TEXT, hash TEXT, hashed_at INTEGER)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS files_hashed_at ON files (hashed_at)")
+        except (OSError, sqlite3.Error):
+            # Run without a cache if the database can't be created
+            self.conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get(self, file_path: str, st: os.stat_result) -> str:
+        """
+        Look up the cached hash of a file.
+
+        Args:
+            file_path: Path to the file
+            st: Current stat result of the file
+
+        Returns:
+            Cached hash, or an empty string if there is no valid entry
+        """
+        if self.conn is None:
+            return ""
+
+        path = os.path.abspath(file_path)
+        try:
+            row = self.conn.execute(
+                "SELECT dev, ino, mtime_ns, ctime_ns, size, algorithm, hash FROM files WHERE path = ?", (path,)
+            ).fetchone()
+        except sqlite3.Error:
+            return ""
+
+        if row is None:
+            return ""
+
+        if row[:6] != (st.st_dev, st.st_ino, st.st_mtime_ns, st.st_ctime_ns, st.st_size, HASH_ALGORITHM):
+            # The file has changed since it was hashed, so the entry can't match again
+            self.stale.append((path,))
+            if len(self.stale) >= self.BATCH_SIZE:
+                self.flush()
+            return ""
+
+        return row[6]
+
+    def put(self, file_path: str, st: os.stat_result, file_hash: str):
+        """
+        Record the hash of a file. Entries are written in batches.
+
+        Args:
+            file_path: Path to the file
+            st: Stat result of the file at the time it was hashed
+            file_hash: Hash of the file
+        """
+        self.pending.append((
+            os.path.abspath(file_path), st.st_dev, st.st_ino, st.st_mtime_ns, st.st_ctime_ns, st.st_size,
+            HASH_ALGORITHM, file_hash, int(time.time())
+        ))
+        if len(self.pending) >= self.BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        """Write pending entries to the database and delete stale ones."""
+        pending, self.pending = self.pending, []
+        stale, self.stale = self.stale, []
+        if self.conn is None or not (pending or stale):
+            return
+
+        try:
+            self.conn.execute("BEGIN")
+            self.conn.executemany("DELETE FROM files WHERE path = ?", stale)
+            self.conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", pending)
+            self.conn.execute("COMMIT")
+        except (sqlite3.Error, OverflowError):
+            # The cache is best-effort, so drop the batch on failure (including
+            # inode numbers too large for an SQLite integer)
+            if self.conn.in_transaction:
+                self.conn.execute("ROLLBACK")
+
+    def prune(self):
+        """Delete entries older than MAX_AGE_DAYS and all but the newest MAX_ENTRIES."""
+        if self.conn is None:
+            return
+
+        cutoff = int(time.time()) - self.MAX_AGE_DAYS * 86400
+        try:
+            self.conn.execute("BEGIN")
+            self.conn.execute("DELETE FROM files WHERE hashed_at < ?", (cutoff,))
+            self.conn.execute(
+                "DELETE FROM files WHERE path IN ("
+                "SELECT path FROM files ORDER BY hashed_at DESC LIMIT -1 OFFSET ?)",
+                (self.MAX_ENTRIES,)
+            )
+            self.conn.execute("COMMIT")
+        except sqlite3.Error:
+            if self.conn.in_transaction:
+                self.conn.execute("ROLLBACK")
+
+    def close(self):
+        """Flush pending entries, prune old ones and close the database."""
+        self.flush()
+        self.prune()
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
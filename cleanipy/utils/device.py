@@ -0,0 +1,68 @@
+"""
+Utility functions for detecting storage device characteristics.
+"""
+import os
+import platform
+from typing import Tuple
+
+
+# I/O tuning by device class: (worker threads, read buffer size in bytes).
+# Rotational disks are seek-bound, so they get few threads and large
+# sequential reads; solid-state devices need more requests in flight.
+DEVICE_PROFILES = {
+    "ssd": (8, 256 * 1024),
+    "hdd": (2, 16 * 1024 * 1024),
+    "unknown": (4, 1024 * 1024)
+}
+
+
+def get_device_class(path: str) -> str:
+    """
+    Determine whether a path is stored on a solid-state or rotational device.
+
+    Detection reads /sys/block/<dev>/queue/rotational and is only supported on
+    Linux; other platforms and virtual filesystems report "unknown".
+
+    Args:
+        path: Path on the device to check
+
+    Returns:
+        "ssd", "hdd" or "unknown"
+    """
+    if platform.system() != "Linux":
+        return "unknown"
+
+    try:
+        st_dev = os.stat(path).st_dev
+        device_dir = os.path.realpath(f"/sys/dev/block/{os.major(st_dev)}:{os.minor(st_dev)}")
+
+        # Partitions don't have a queue directory, so also check the parent disk
+        for candidate in (device_dir, os.path.dirname(device_dir)):
+            rotational_path = os.path.join(candidate, "queue", "rotational")
+            if os.path.exists(rotational_path):
+                with open(rotational_path) as file:
+                    return "hdd" if file.read().strip() == "1" else "ssd"
+    except (OSError, ValueError):
+        pass
+
+    return "unknown"
+
+
+def get_device_profile(path: str) -> Tuple[int, int, bool]:
+    """
+    Get I/O settings suited to the device a path is stored on.
+
+    Args:
+        path: Path being analyzed or cleaned
+
+    Returns:
+        Tuple of (worker threads, read buffer size, whether to use mmap for large files)
+    """
+    device_class = get_device_class(path)
+    workers, block_size = DEVICE_PROFILES[device_class]
+
+    # Multi-threaded mmap hashing reads several regions of a file at once,
+    # which turns into random seeks on a rotational disk
+    use_mmap = device_class != "hdd"
+
+    return workers, block_size, use_mmap
@@ -2,10 +2,109 @@
 Utility functions for file operations.
 """
 import os
+import fnmatch
 import hashlib
+import mmap
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Dict, Set, Generator, Tuple
 
+try:
+    import blake3
+except ImportError:
+    # BLAKE3 is optional; fall back to xxHash or SHA-256 from the standard library
+    blake3 = None
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+
+# Name of the algorithm used by get_file_hash
+if blake3 is not None:
+    HASH_ALGORITHM = "blake3"
+elif xxhash is not None:
+    HASH_ALGORITHM = "xxh3_128"
+else:
+    HASH_ALGORITHM = "sha256"
+
+# Read buffer sizes used when hashing files
+HASH_BLOCK_SIZE = 1024 * 1024  # 1 MB
+LARGE_HASH_BLOCK_SIZE = 16 * 1024 * 1024  # 16 MB
+
+# Files above this size are hashed on several threads (BLAKE3) or read with the large buffer
+LARGE_FILE_THRESHOLD = 256 * 1024 * 1024  # 256 MB
+
+# Files from this size up are hashed through a memory map (when allowed)
+MMAP_HASH_THRESHOLD = 1024 * 1024  # 1 MB
+
+# Files above this size get read-ahead and cache eviction hints when hashed
+FADVISE_THRESHOLD = 16 * 1024 * 1024  # 16 MB
+
+# Bytes sampled from the start (and end) of a file for a prefix hash
+PREFIX_HASH_SIZE = 4096  # 4 KB
+
+# Files above this size also have their last bytes sampled for the prefix hash
+PREFIX_HASH_TAIL_THRESHOLD = 64 * 1024  # 64 KB
+
+# Path separators of this platform, for single-call str.endswith checks
+PATH_SEPARATORS = tuple(sep for sep in (os.sep, os.altsep) if sep)
+
+# Directory names that can be skipped when walking (dependency, VCS and build
+# trees that are rarely worth cleaning file by file)
+DEFAULT_SKIP_DIRS = frozenset({"node_modules", ".git", "__pycache__", ".venv", "venv", "target", ".cache"})
+
+# Virtual filesystems that are never descended into when found below the walked directory
+SKIP_MOUNTS = frozenset({"/proc", "/sys", "/dev", "/run"})
+
+# Number of directories listed at the same time by walk_concurrent
+WALK_WORKERS = 16
+
+# Nanoseconds in a day, for file age checks
+NANOSECONDS_PER_DAY = 86400 * 10 ** 9
+
+# Held around send2trash calls: on Linux it picks a free name in the trash and
+# then renames the file there, so concurrent calls trashing files with the same
+# name can pick the same name and overwrite each other
+TRASH_LOCK = threading.Lock()
+
+# Per-thread read buffer reused across get_file_hash calls
+_hash_buffers = threading.local()
+
+
+def _time_ns() -> int:
+    """
+    Get the current time in nanoseconds since the epoch.
+
+    Returns:
+        Current time in nanoseconds (time.time_ns is Python 3.7+)
+    """
+    if hasattr(time, "time_ns"):
+        return time.time_ns()
+    return int(time.time() * 10 ** 9)
+
+
+def get_path_prefix(dirpath: str) -> str:
+    """
+    Get the prefix to concatenate with names in a directory to build their paths.
+
+    This is cheaper than calling os.path.join for every file in a walk loop.
+
+    Args:
+        dirpath: Directory path (as returned by os.walk)
+
+    Returns:
+        Directory path ending with a path separator
+    """
+    if dirpath.endswith(PATH_SEPARATORS):
+        return dirpath
+    return dirpath + os.sep
+
 
 def get_file_size(file_path: str) -> int:
     """
@@ -23,47 +122,348 @@ def get_file_size(file_path: str) -> int:
         return 0
 
 
-def get_directory_size(directory: str) -> int:
+def get_directory_size(directory: str, skip: Set[str] = None) -> int:
     """
     Calculate the total size of a directory in bytes.
 
     Args:
         directory: Path to the directory
+        skip: Names of subdirectories not to descend into (e.g. DEFAULT_SKIP_DIRS)
 
     Returns:
         Total size in bytes
     """
-    total_size = 0
+    return sum(st.st_size for _, st in iter_files(directory, skip))
+
+
+def iter_file_entries(directory: str, skip: Set[str] = None) -> Generator[os.DirEntry, None, None]:
+    """
+    Walk a directory tree with os.scandir, yielding the entries of regular files.
+
+    Symbolic links are skipped and never followed. File types come from the
+    directory listing, so no files are stat'ed unless the caller asks for it.
+    Skipped subdirectories (and SKIP_MOUNTS) are filtered out before they are
+    listed, so none of their contents are read.
+
+    Args:
+        directory: Directory to walk
+        skip: Names of subdirectories not to descend into (e.g. DEFAULT_SKIP_DIRS)
+
+    Yields:
+        os.DirEntry objects for regular files
+    """
+    skip = skip or frozenset()
+    stack = [directory]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in skip and entry.path not in SKIP_MOUNTS:
+                                stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            yield entry
+                    except OSError:
+                        # Skip entries that can't be accessed
+                        continue
+        except OSError:
+            # Skip directories that can't be accessed
+            continue
+
+
+def iter_files(directory: str, skip: Set[str] = None) -> Generator[Tuple[str, os.stat_result], None, None]:
+    """
+    Walk a directory tree with os.scandir, yielding regular files and their stat results.
+
+    Symbolic links are skipped and never followed. The stat result comes from
+    the directory entry, so no separate islink/getsize calls are needed.
+
+    Args:
+        directory: Directory to walk
+        skip: Names of subdirectories not to descend into (e.g. DEFAULT_SKIP_DIRS)
+
+    Yields:
+        Tuples of (file path, stat result)
+    """
+    for entry in iter_file_entries(directory, skip):
+        try:
+            yield entry.path, entry.stat(follow_symlinks=False)
+        except OSError:
+            # Skip files that disappeared or can't be accessed
+            continue
+
+
+def _scan_directory(dirpath: str, skip: Set[str]) -> Tuple[List[str], List[Tuple[str, os.stat_result]]]:
+    """
+    List a single directory, separating subdirectories from regular files.
+
+    Args:
+        dirpath: Directory to list
+        skip: Names of subdirectories to leave out
+
+    Returns:
+        Tuple of (subdirectory paths, list of (file path, stat result))
+    """
+    subdirs = []
+    files = []
     try:
-        for dirpath, _, filenames in os.walk(directory):
-            for filename in filenames:
-                file_path = os.path.join(dirpath, filename)
-                if not os.path.islink(file_path):
-                    total_size += get_file_size(file_path)
-    except (PermissionError, FileNotFoundError):
+        with os.scandir(dirpath) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in skip and entry.path not in SKIP_MOUNTS:
+                            subdirs.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        files.append((entry.path, entry.stat(follow_symlinks=False)))
+                except OSError:
+                    # Skip entries that can't be accessed
+                    continue
+    except OSError:
+        # Skip directories that can't be accessed
         pass
 
-    return total_size
+    return subdirs, files
 
 
-def get_file_hash(file_path: str, block_size: int = 65536) -> str:
+def walk_concurrent(root: str, max_workers: int = WALK_WORKERS, skip: Set[str] = None
+                    ) -> Generator[Tuple[str, List[str], List[Tuple[str, os.stat_result]]], None, None]:
     """
-    Calculate the SHA-256 hash of a file.
+    Walk a directory tree, listing several directories at the same time.
+
+    Each scandir call is a round trip on network filesystems (and a syscall
+    locally), so a serial walk is bound by latency. Here directories are
+    listed and their files stat'ed in a thread pool, and every subdirectory
+    found is queued for the next free worker.
+
+    Directories are yielded in the order they finish, but always after their
+    parent. Symbolic links are skipped and never followed, and skipped
+    subdirectories (and SKIP_MOUNTS) are left out of the subdirectory lists.
+
+    Args:
+        root: Directory to walk
+        max_workers: Maximum number of directories listed at the same time
+        skip: Names of subdirectories not to descend into (e.g. DEFAULT_SKIP_DIRS)
+
+    Yields:
+        Tuples of (directory path, subdirectory paths, list of (file path, stat result))
+    """
+    skip = skip or frozenset()
+    results = queue.Queue()
+    stopped = threading.Event()
+
+    def scan(dirpath):
+        # Tasks still queued when the walk is abandoned finish without listing
+        if stopped.is_set():
+            results.put((dirpath, [], []))
+            return
+        try:
+            subdirs, files = _scan_directory(dirpath, skip)
+        except Exception:
+            subdirs, files = [], []
+        results.put((dirpath, subdirs, files))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        try:
+            executor.submit(scan, root)
+            pending = 1
+            while pending:
+                dirpath, subdirs, files = results.get()
+                pending -= 1
+
+                # Queue subdirectories before handing the results to the caller,
+                # so workers keep listing while the caller processes them
+                for subdir in subdirs:
+                    executor.submit(scan, subdir)
+                pending += len(subdirs)
+
+                yield dirpath, subdirs, files
+        finally:
+            stopped.set()
+
+
+def new_hasher():
+    """
+    Create a new hash object for file content hashing.
+
+    Only exact content comparison is needed, so a fast hash is preferred over
+    SHA-256. The choice is recorded in HASH_ALGORITHM.
+
+    Returns:
+        A BLAKE3 hasher if the blake3 package is installed, otherwise xxh3-128
+        if the xxhash package is installed, otherwise SHA-256
+    """
+    if blake3 is not None:
+        return blake3.blake3()
+    if xxhash is not None:
+        return xxhash.xxh3_128()
+    return hashlib.sha256()
+
+
+def _get_hash_buffer(size: int) -> memoryview:
+    """
+    Get this thread's reusable read buffer, growing it if needed.
+
+    Args:
+        size: Minimum buffer size in bytes
+
+    Returns:
+        Memoryview of exactly the requested size
+    """
+    buf = getattr(_hash_buffers, "buf", None)
+    if buf is None or len(buf) < size:
+        buf = bytearray(size)
+        _hash_buffers.buf = buf
+    return memoryview(buf)[:size]
+
+
+def _hash_mapped(fd: int):
+    """
+    Hash an open file through a read-only memory map, in a single update.
+
+    The hash function streams the mapping in C, with no Python-side chunking
+    and no copy into a read buffer.
+
+    Args:
+        fd: File descriptor of the file to hash
+
+    Returns:
+        Hasher object with the file's contents, or None if it can't be mapped
+    """
+    try:
+        with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mapped:
+            if hasattr(mapped, "madvise"):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            hasher = new_hasher()
+            hasher.update(mapped)
+            return hasher
+    except (OSError, ValueError):
+        # Some files (e.g. on special filesystems) can't be mapped
+        return None
+
+
+def get_file_hash(file_path: str, block_size: int = None, use_mmap: bool = True) -> str:
+    """
+    Calculate the content hash of a file.
+
+    BLAKE3 is used when available, otherwise xxh3-128 or SHA-256 (see
+    new_hasher). Files from MMAP_HASH_THRESHOLD up are memory-mapped and
+    hashed in a single update, the rest are read into a reused buffer.
+
+    Args:
+        file_path: Path to the file
+        block_size: Size of blocks to read (default: chosen from the file size)
+        use_mmap: Whether large files may be hashed through a memory map
+
+    Returns:
+        Hash as a hexadecimal string
+    """
+    try:
+        with open(file_path, 'rb', buffering=0) as file:
+            fd = file.fileno()
+            size = os.fstat(fd).st_size
+
+            # Large files are read once, so ask for aggressive read-ahead and
+            # drop them from the page cache afterwards (not available on Windows)
+            fadvise = size > FADVISE_THRESHOLD and hasattr(os, "posix_fadvise")
+            if fadvise:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+
+            hasher = None
+            if use_mmap and blake3 is not None and size > LARGE_FILE_THRESHOLD:
+                # BLAKE3 hashes a mapped file on several threads
+                hasher = blake3.blake3(max_threads=blake3.blake3.AUTO)
+                hasher.update_mmap(file_path)
+            elif use_mmap and size >= MMAP_HASH_THRESHOLD:
+                hasher = _hash_mapped(fd)
+
+            if hasher is None:
+                if block_size is None:
+                    block_size = LARGE_HASH_BLOCK_SIZE if size > LARGE_FILE_THRESHOLD else HASH_BLOCK_SIZE
+                buf = _get_hash_buffer(block_size)
+
+                hasher = new_hasher()
+                n = file.readinto(buf)
+                while n:
+                    # Only the last, partial block needs a sliced view
+                    hasher.update(buf if n == block_size else buf[:n])
+                    n = file.readinto(buf)
+
+            if fadvise:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        return hasher.hexdigest()
+    except (PermissionError, FileNotFoundError):
+        return ""
+
+
+def hash_files_parallel(file_paths: List[str], workers: int = None, block_size: int = None,
+                        use_mmap: bool = True) -> Generator[str, None, None]:
+    """
+    Calculate the content hashes of many files concurrently.
+
+    Threads are used rather than processes: the reads and the hash functions
+    release the GIL, so threads scale across cores without the cost of
+    starting processes and passing paths and digests between them.
+
+    Args:
+        file_paths: List of files to hash
+        workers: Number of threads to use (default: chosen by ThreadPoolExecutor)
+        block_size: Size of blocks to read (see get_file_hash)
+        use_mmap: Whether large files may be hashed through a memory map
+
+    Yields:
+        Hash of each file as a hexadecimal string, in the order of file_paths
+        ("" for files that couldn't be read). Files not hashed yet are skipped
+        if the caller stops early.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(lambda file_path: get_file_hash(file_path, block_size, use_mmap), file_paths)
+
+
+def get_file_prefix_hash(file_path: str, sample_size: int = PREFIX_HASH_SIZE, size: int = None) -> str:
+    """
+    Calculate a cheap hash of the first (and, for larger files, last) bytes of a file.
+
+    Files with different prefix hashes can't be identical, so this is used to
+    discard duplicate candidates before hashing their full content. For files
+    no larger than sample_size the result equals get_file_hash.
 
     Args:
         file_path: Path to the file
-        block_size: Size of blocks to read
+        sample_size: Number of bytes to read from each end of the file
+        size: Size of the file, if already known (saves a stat call)
 
     Returns:
-        SHA-256 hash as a hexadecimal string
+        Hash as a hexadecimal string
     """
-    hasher = hashlib.sha256()
+    hasher = new_hasher()
     try:
-        with open(file_path, 'rb') as file:
-            buf = file.read(block_size)
-            while buf:
-                hasher.update(buf)
-                buf = file.read(block_size)
+        # Unbuffered, so only the sampled bytes are read from disk
+        with open(file_path, 'rb', buffering=0) as file:
+            fd = file.fileno()
+            if size is None:
+                size = os.fstat(fd).st_size
+            # The tail is only sampled past the end of the first sample, so it
+            # never starts at a negative offset when sample_size exceeds the size
+            sample_tail = size > max(PREFIX_HASH_TAIL_THRESHOLD, sample_size)
+
+            # Samples are read into this thread's reusable buffer, so no bytes
+            # objects are allocated per file
+            buf = _get_hash_buffer(sample_size)
+            if hasattr(os, "preadv"):
+                # Positional reads avoid a separate seek for the tail
+                n = os.preadv(fd, [buf], 0)
+                hasher.update(buf[:n])
+                if sample_tail:
+                    n = os.preadv(fd, [buf], size - sample_size)
+                    hasher.update(buf[:n])
+            else:
+                n = file.readinto(buf)
+                hasher.update(buf[:n])
+                if sample_tail:
+                    file.seek(size - sample_size)
+                    n = file.readinto(buf)
+                    hasher.update(buf[:n])
         return hasher.hexdigest()
     except (PermissionError, FileNotFoundError):
         return ""
@@ -80,24 +480,54 @@ def find_files_by_extension(directory: str, extensions: List[str]) -> Generator[
     Yields:
         Paths to files with matching extensions
     """
-    for dirpath, _, filenames in os.walk(directory):
-        for filename in filenames:
-            if any(filename.endswith(ext) for ext in extensions):
-                yield os.path.join(dirpath, filename)
+    # str.endswith checks a tuple of suffixes in a single call
+    extensions = tuple(extensions)
+    for entry in iter_file_entries(directory):
+        if entry.name.endswith(extensions):
+            yield entry.path
 
 
-def find_files_by_pattern(directory: str, pattern: str) -> Generator[str, None, None]:
+def find_files_by_pattern(directory: str, pattern: str) -> Generator[Path, None, None]:
     """
     Find all files matching a glob pattern in a directory and its subdirectories.
 
+    Only regular files are yielded: unlike Path.rglob, directories and
+    symbolic links that match the pattern are left out.
+
     Args:
         directory: Directory to search in
         pattern: Glob pattern to match (e.g., '*.log')
 
     Yields:
-        Paths to files matching the pattern
+        Path objects for files matching the pattern
+    """
+    if os.sep in pattern or (os.altsep and os.altsep in pattern):
+        # Patterns spanning directories need pathlib's matching
+        for path in Path(directory).rglob(pattern):
+            if path.is_file() and not path.is_symlink():
+                yield path
+        return
+
+    # Otherwise only names need matching, so entries can be filtered as they are listed
+    match = re.compile(fnmatch.translate(os.path.normcase(pattern))).match
+    for entry in iter_file_entries(directory):
+        if match(os.path.normcase(entry.name)):
+            yield Path(entry.path)
+
+
+def get_age_cutoff_ns(days: int) -> int:
+    """
+    Get the modification time, in nanoseconds, before which a file is older than a number of days.
+
+    Compute this once before a loop and compare each file's st_mtime_ns against it.
+
+    Args:
+        days: Number of days
+
+    Returns:
+        Cutoff time in nanoseconds since the epoch
     """
-    return Path(directory).rglob(pattern)
+    return _time_ns() - days * NANOSECONDS_PER_DAY
 
 
 def is_file_older_than(file_path: str, days: int) -> bool:
@@ -111,13 +541,31 @@ def is_file_older_than(file_path: str, days: int) -> bool:
     Returns:
         True if the file is older than the specified number of days
     """
+    # If days is 0, all files are considered newer
+    if days <= 0:
+        return False
+
     try:
-        file_time = os.path.getmtime(file_path)
-        import time
-        current_time = time.time()
-        # If days is 0, all files are considered newer
-        if days <= 0:
-            return False
-        return (current_time - file_time) > (days * 86400)  # 86400 seconds in a day
+        return os.stat(file_path).st_mtime_ns < get_age_cutoff_ns(days)
     except (FileNotFoundError, PermissionError):
         return False
+
+
+def is_entry_older_than(entry: os.DirEntry, cutoff_ns: int) -> bool:
+    """
+    Check if a directory entry was last modified before a cutoff time.
+
+    The stat result cached by os.scandir is reused, so walk loops don't stat
+    the file again.
+
+    Args:
+        entry: Directory entry from os.scandir
+        cutoff_ns: Cutoff time in nanoseconds (see get_age_cutoff_ns)
+
+    Returns:
+        True if the entry was modified before the cutoff
+    """
+    try:
+        return entry.stat(follow_symlinks=False).st_mtime_ns < cutoff_ns
+    except OSError:
+        return False
@@ -1,39 +1,105 @@
 """
 Utility functions for handling file sizes and conversions.
 """
-from typing import Tuple
+import bisect
+import functools
+import re
+from typing import List, Tuple
 
+try:
+    import numpy
+except ImportError:
+    # NumPy is optional; sizes are formatted one at a time without it
+    numpy = None
 
+
+# Size units, smallest first
+SIZE_UNITS = ["B", "KB", "MB", "GB", "TB", "PB"]
+
+# Multiplier of each size unit
+SIZE_UNIT_MULTIPLIERS = {unit: 1024 ** index for index, unit in enumerate(SIZE_UNITS)}
+
+KB = 1 << 10
+MB = 1 << 20
+GB = 1 << 30
+
+# Ranges reported by get_size_distribution, and the sizes at which each range
+# after the first starts
+SIZE_RANGES = ["< 1 KB", "1 KB - 1 MB", "1 MB - 10 MB", "10 MB - 100 MB", "100 MB - 1 GB", "> 1 GB"]
+SIZE_RANGE_BOUNDS = [KB, MB, 10 * MB, 100 * MB, GB]
+
+# Lists shorter than this are formatted with format_size, which is cheaper than
+# converting them to an array
+BULK_FORMAT_THRESHOLD = 256
+
+# Lists shorter than this are bucketed by get_size_distribution without NumPy
+BULK_DISTRIBUTION_THRESHOLD = 1024
+
+# Numeric part and unit of a human-readable size string
+SIZE_PATTERN = re.compile(r"^([\d.]+)\s*([A-Z]+)$")
+
+
+@functools.lru_cache(maxsize=4096)
 def format_size(size_bytes: int) -> str:
     """
     Format a size in bytes to a human-readable string.
     
+    Results are cached, since tables repeat the same sizes (e.g. "0 B") often.
+    
     Args:
         size_bytes: Size in bytes
         
     Returns:
         Human-readable size string (e.g., "1.23 MB")
     """
-    if size_bytes == 0:
+    if size_bytes <= 0:
         return "0 B"
     
-    # Define size units and their respective thresholds
-    units = ["B", "KB", "MB", "GB", "TB", "PB"]
-    
-    # Calculate the appropriate unit
-    import math
-    unit_index = min(5, math.floor(math.log(size_bytes, 1024)))
-    size_value = size_bytes / (1024 ** unit_index)
+    # Calculate the appropriate unit: each unit is 10 more bits, so the
+    # bit length gives floor(log1024(size)) without a float logarithm
+    unit_index = min(5, (int(size_bytes).bit_length() - 1) // 10)
+    size_value = size_bytes / (1 << (10 * unit_index))
     
     # Format the output
     if unit_index == 0:
         # For bytes, show as integer
-        return f"{int(size_value)} {units[unit_index]}"
+        return f"{int(size_value)} {SIZE_UNITS[unit_index]}"
     else:
         # For larger units, show with 2 decimal places
-        return f"{size_value:.2f} {units[unit_index]}"
+        return f"{size_value:.2f} {SIZE_UNITS[unit_index]}"
 
 
+def format_sizes_bulk(sizes: List[int]) -> List[str]:
+    """
+    Format many sizes in bytes to human-readable strings, like format_size.
+    
+    When NumPy is installed, units and scaled values for long lists are
+    computed in a single array pass, leaving only the string formatting to
+    Python.
+    
+    Args:
+        sizes: Sizes in bytes
+        
+    Returns:
+        Human-readable size strings, in the same order as the sizes
+    """
+    if numpy is None or len(sizes) < BULK_FORMAT_THRESHOLD:
+        return [format_size(size) for size in sizes]
+    
+    values = numpy.asarray(sizes, dtype=numpy.int64)
+    
+    # Same unit selection as format_size: the number of 10-bit steps, capped at PB
+    thresholds = numpy.array([1 << (10 * index) for index in range(1, len(SIZE_UNITS))], dtype=numpy.int64)
+    unit_indices = numpy.searchsorted(thresholds, values, side="right")
+    scaled = values / numpy.left_shift(1, 10 * unit_indices)
+    
+    return [
+        "0 B" if size <= 0 else f"{size} B" if unit_index == 0 else f"{value:.2f} {SIZE_UNITS[unit_index]}"
+        for size, unit_index, value in zip(values.tolist(), unit_indices.tolist(), scaled.tolist())
+    ]
+
+
+@functools.lru_cache(maxsize=256)
 def parse_size(size_str: str) -> int:
     """
     Parse a human-readable size string to bytes.
@@ -46,62 +112,42 @@ def parse_size(size_str: str) -> int:
     """
     size_str = size_str.strip().upper()
     
-    # Define size units and their respective multipliers
-    units = {
-        "B": 1,
-        "KB": 1024,
-        "MB": 1024 ** 2,
-        "GB": 1024 ** 3,
-        "TB": 1024 ** 4,
-        "PB": 1024 ** 5
-    }
-    
     # Extract the numeric part and the unit
-    import re
-    match = re.match(r"^([\d.]+)\s*([A-Z]+)$", size_str)
+    match = SIZE_PATTERN.match(size_str)
     if not match:
         raise ValueError(f"Invalid size format: {size_str}")
     
     value, unit = match.groups()
     
     # Convert to bytes
-    if unit not in units:
+    if unit not in SIZE_UNIT_MULTIPLIERS:
         raise ValueError(f"Unknown unit: {unit}")
     
-    return int(float(value) * units[unit])
+    return int(float(value) * SIZE_UNIT_MULTIPLIERS[unit])
 
 
 def get_size_distribution(sizes: list) -> dict:
     """
     Calculate the distribution of sizes.
     
+    When NumPy is installed, long lists (or NumPy arrays) are bucketed in a
+    single vectorized pass.
+    
     Args:
-        sizes: List of sizes in bytes
+        sizes: List (or NumPy array) of sizes in bytes
         
     Returns:
         Dictionary with size ranges as keys and counts as values
     """
-    ranges = {
-        "< 1 KB": 0,
-        "1 KB - 1 MB": 0,
-        "1 MB - 10 MB": 0,
-        "10 MB - 100 MB": 0,
-        "100 MB - 1 GB": 0,
-        "> 1 GB": 0
-    }
+    if numpy is not None and (isinstance(sizes, numpy.ndarray) or len(sizes) >= BULK_DISTRIBUTION_THRESHOLD):
+        range_indices = numpy.searchsorted(SIZE_RANGE_BOUNDS, numpy.asarray(sizes, dtype=numpy.int64), side="right")
+        counts = numpy.bincount(range_indices, minlength=len(SIZE_RANGES)).tolist()
+        return dict(zip(SIZE_RANGES, counts))
+    
+    counts = [0] * len(SIZE_RANGES)
     
+    # bisect finds the range of each size in C, instead of an if/elif cascade
     for size in sizes:
-        if size < 1024:
-            ranges["< 1 KB"] += 1
-        elif size < 1024 ** 2:
-            ranges["1 KB - 1 MB"] += 1
-        elif size < 10 * 1024 ** 2:
-            ranges["1 MB - 10 MB"] += 1
-        elif size < 100 * 1024 ** 2:
-            ranges["10 MB - 100 MB"] += 1
-        elif size < 1024 ** 3:
-            ranges["100 MB - 1 GB"] += 1
-        else:
-            ranges["> 1 GB"] += 1
-    
-    return ranges
+        counts[bisect.bisect_right(SIZE_RANGE_BOUNDS, size)] += 1
+    
+    return dict(zip(SIZE_RANGES, counts))
@@ -1,7 +1,11 @@
 """
 Terminal UI utilities for CleanIPy.
 """
-from typing import List, Dict, Any, Optional, Callable
+import os
+import time
+from itertools import islice
+from typing import List, Dict, Any, Optional, Callable, Iterable, Sequence
+from rich.cells import cell_len
 from rich.console import Console
 from rich.table import Table
 from rich.progress import Progress, TextColumn, BarColumn, TaskProgressColumn
@@ -13,6 +17,12 @@ from rich.text import Text
 # Create a console instance
 console = Console()
 
+# Rows rendered at a time by display_table_rows
+TABLE_CHUNK_ROWS = 200
+
+# Minimum time between file name updates of a progress bar, in seconds
+PROGRESS_UPDATE_INTERVAL = 0.05
+
 
 def print_header(text: str) -> None:
     """
@@ -117,6 +127,53 @@ def display_table(table: Table) -> None:
     console.print(table)
 
 
+def display_table_rows(title: str, columns: List[str], rows: Iterable[Sequence[str]],
+                       chunk_size: int = TABLE_CHUNK_ROWS) -> None:
+    """
+    Display a table, rendering its rows a chunk at a time.
+
+    Only one chunk of rows is held as Rich cells at once, and the first rows
+    are shown before the rest have been built. Tables that fit in one chunk
+    are printed like display_table. Longer ones are printed without outer
+    edges, with the column widths of the first chunk (longer cells wrap), so
+    the chunks line up as one table under a single title and header.
+
+    Args:
+        title: Table title
+        columns: List of column names
+        rows: Rows of cell values, in display order (a generator is fine)
+        chunk_size: Number of rows rendered at a time
+    """
+    rows = iter(rows)
+    chunk = list(islice(rows, chunk_size))
+    next_chunk = list(islice(rows, chunk_size))
+    if not next_chunk:
+        table = create_table(title, columns)
+        for row in chunk:
+            table.add_row(*row)
+        console.print(table)
+        return
+
+    # Size the columns from the header and the first chunk
+    widths = [cell_len(column) for column in columns]
+    for row in chunk:
+        for i, cell in enumerate(row):
+            widths[i] = max(widths[i], cell_len(str(cell)))
+
+    show_header = True
+    while chunk:
+        table = Table(title=title, show_header=show_header, show_edge=False)
+        for column, width in zip(columns, widths):
+            table.add_column(column, width=width, overflow="fold")
+        for row in chunk:
+            table.add_row(*row)
+        console.print(table)
+
+        # Following chunks continue the same table without repeating the header
+        title, show_header = None, False
+        chunk, next_chunk = next_chunk, list(islice(rows, chunk_size))
+
+
 def create_progress_bar(description: str = "Processing") -> Progress:
     """
     Create a progress bar.
@@ -134,6 +191,37 @@ def create_progress_bar(description: str = "Processing") -> Progress:
     )
 
 
+def create_progress_callback(progress: Progress, task: Any, action: str,
+                             interval: float = PROGRESS_UPDATE_INTERVAL) -> Callable[[str], None]:
+    """
+    Create a callback that shows the file being processed in a progress bar.
+
+    Updates closer together than the interval are dropped: a re-render per
+    file is expensive and too fast to read, and the file name is only
+    extracted for the updates actually shown.
+
+    Args:
+        progress: Rich Progress object
+        task: ID of the progress task to update
+        action: Verb shown before the file name (e.g. "Cleaning")
+        interval: Minimum time between updates, in seconds
+
+    Returns:
+        Callback taking the path of the file being processed
+    """
+    last_update = -interval
+
+    def update_progress(file_path: str) -> None:
+        nonlocal last_update
+        now = time.monotonic()
+        if now - last_update < interval:
+            return
+        last_update = now
+        progress.update(task, description=f"{action}: {os.path.basename(file_path)}")
+
+    return update_progress
+
+
 def display_menu(title: str, options: List[str]) -> int:
     """
     Display a menu and get user selection.
@@ -150,17 +238,19 @@ def display_menu(title: str, options: List[str]) -> int:
     for i, option in enumerate(options, 1):
         console.print(f"[cyan]{i}.[/cyan] {option}")
 
-    console.print("\n[bold]Enter your choice (1-{}):[/bold] ".format(len(options)), end="")
+    console.print(f"\n[bold]Enter your choice (1-{len(options)}):[/bold] ", end="")
 
     while True:
-        try:
-            choice = int(input())
-            if 1 <= choice <= len(options):
-                return choice - 1
-            else:
-                console.print("[bold red]Invalid choice. Please try again:[/bold red] ", end="")
-        except ValueError:
+        # Check for digits up front rather than catching int() errors
+        choice = input().strip()
+        if not choice.isdecimal():
             console.print("[bold red]Please enter a number:[/bold red] ", end="")
+            continue
+
+        choice = int(choice)
+        if 1 <= choice <= len(options):
+            return choice - 1
+        console.print("[bold red]Invalid choice. Please try again:[/bold red] ", end="")
 
 
 def display_panel(title: str, content: str) -> None:
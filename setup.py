@@ -26,9 +26,15 @@ setup(
     include_package_data=True,
     install_requires=requirements,
     extras_require={
+        "fast": [
+            "blake3>=0.3.1",
+            "numpy>=1.19.0",
+        ],
         "dev": [
             "pytest>=6.0.0",
             "pytest-cov>=2.12.0",
+            "pytest-xdist>=2.5.0",
+            "numpy>=1.19.0",
             "black>=21.5b2",
             "flake8>=3.9.2",
         ],
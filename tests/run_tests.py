@@ -2,6 +2,7 @@
 """
 Test runner for CleanIPy.
 """
+import importlib.util
 import unittest
 import sys
 import os
@@ -10,11 +11,39 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 
+# Test modules to run, loaded by name instead of discovered on each run
+TEST_MODULES = [
+    "tests.test_disk_analyzer",
+    "tests.test_disk_cleaner",
+    "tests.test_duplicate_analyzer",
+    "tests.test_duplicate_cleaner",
+    "tests.test_temp_analyzer",
+    "tests.test_temp_cleaner",
+    "tests.test_utils",
+]
+
+
 def run_tests():
     """Run all tests."""
-    # Discover and run all tests
+    # Prefer pytest when it is installed, its collection is faster
+    try:
+        import pytest
+    except ImportError:
+        pytest = None
+    
+    if pytest is not None:
+        args = ["-q", os.path.dirname(os.path.abspath(__file__))]
+        
+        # The test modules share no state, so spread them over all cores when
+        # pytest-xdist is installed
+        if importlib.util.find_spec("xdist") is not None:
+            args[:0] = ["-n", "auto"]
+        
+        return pytest.main(args)
+    
+    # Load the test modules
     test_loader = unittest.TestLoader()
-    test_suite = test_loader.discover(os.path.dirname(__file__), pattern="test_*.py")
+    test_suite = test_loader.loadTestsFromNames(TEST_MODULES)
     
     # Run the tests
     test_runner = unittest.TextTestRunner(verbosity=2)
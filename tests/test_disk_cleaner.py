@@ -2,32 +2,47 @@
 Tests for disk cleaner functions.
 """
 import os
+import shutil
 import tempfile
 import unittest
 import time
-import send2trash
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 from cleanipy.cleaners.disk_cleaner import (
-    clean_directory, clean_old_files, clean_large_files
+    clean_directory, clean_old_files, clean_large_files, remove_files
 )
 
 
+# Contents of the clean_dir and old_files_dir files (only their presence is checked)
+FILE_CONTENT = b"Content" * 100
+
+
+def fake_send2trash(paths):
+    """Stand-in for send2trash that deletes the files (a path or a list of paths)."""
+    for file_path in [paths] if isinstance(paths, str) else paths:
+        os.remove(file_path)
+
+
 class TestDiskCleaner(unittest.TestCase):
     """Test disk cleaner functions."""
 
     def setUp(self):
         """Set up test environment."""
+        # Delete files instead of going through the real trash
+        patcher = patch('cleanipy.cleaners.disk_cleaner.send2trash', side_effect=fake_send2trash)
+        self.mock_send2trash = patcher.start()
+        self.addCleanup(patcher.stop)
+
         # Create a temporary directory
-        self.temp_dir = tempfile.TemporaryDirectory()
-        self.test_dir = self.temp_dir.name
+        self.test_dir = tempfile.mkdtemp(prefix="cleanipy_test_")
 
         # Create test files
         self.create_test_files()
 
     def tearDown(self):
         """Clean up test environment."""
-        self.temp_dir.cleanup()
+        shutil.rmtree(self.test_dir, ignore_errors=True)
 
     def create_test_files(self):
         """Create test files."""
@@ -45,8 +60,7 @@ class TestDiskCleaner(unittest.TestCase):
         self.clean_dir_files = []
         for i in range(5):
             file_path = os.path.join(self.dirs["clean_dir"], f"file_{i}.txt")
-            with open(file_path, "w") as f:
-                f.write(f"Content {i}" * 100)
+            Path(file_path).write_bytes(FILE_CONTENT)
             self.clean_dir_files.append(file_path)
 
         # Create files in old_files_dir (we can't easily create old files,
@@ -54,8 +68,7 @@ class TestDiskCleaner(unittest.TestCase):
         self.old_files_dir_files = []
         for i in range(5):
             file_path = os.path.join(self.dirs["old_files_dir"], f"file_{i}.txt")
-            with open(file_path, "w") as f:
-                f.write(f"Content {i}" * 100)
+            Path(file_path).write_bytes(FILE_CONTENT)
             self.old_files_dir_files.append(file_path)
 
         # Create files in large_files_dir
@@ -65,14 +78,16 @@ class TestDiskCleaner(unittest.TestCase):
             "large": os.path.join(self.dirs["large_files_dir"], "large.txt"),
         }
 
-        with open(self.large_files_dir_files["small"], "w") as f:
-            f.write("S" * 1024)  # 1 KB
-
-        with open(self.large_files_dir_files["medium"], "w") as f:
-            f.write("M" * (10 * 1024))  # 10 KB
-
-        with open(self.large_files_dir_files["large"], "w") as f:
-            f.write("L" * (100 * 1024))  # 100 KB
+        # Only sizes matter here, so the files are sparse
+        sizes = {
+            "small": 1024,  # 1 KB
+            "medium": 10 * 1024,  # 10 KB
+            "large": 100 * 1024,  # 100 KB
+        }
+        for name, size in sizes.items():
+            with open(self.large_files_dir_files[name], "wb"):
+                pass
+            os.truncate(self.large_files_dir_files[name], size)
 
     def test_clean_directory(self):
         """Test clean_directory function."""
@@ -112,12 +127,33 @@ class TestDiskCleaner(unittest.TestCase):
         self.assertFalse(result["success"])
         self.assertIsNotNone(result["error"])
 
-    @patch('cleanipy.utils.file_utils.is_file_older_than')
-    @patch('send2trash.send2trash')
-    def test_clean_old_files(self, mock_send2trash, mock_is_file_older_than):
+    def test_clean_directory_nested(self):
+        """Test clean_directory with nested directories."""
+        # Move the files into nested subdirectories
+        nested_dir = os.path.join(self.dirs["clean_dir"], "a", "b")
+        os.makedirs(nested_dir)
+        for file_path in self.clean_dir_files[:3]:
+            os.rename(file_path, os.path.join(nested_dir, os.path.basename(file_path)))
+        
+        callback_mock = MagicMock()
+        result = clean_directory(self.dirs["clean_dir"], callback=callback_mock)
+        
+        # All files should be counted and the directory should be empty
+        self.assertTrue(result["success"])
+        self.assertEqual(result["total_count"], 5)
+        self.assertEqual(len(os.listdir(self.dirs["clean_dir"])), 0)
+        
+        # The callback should be called for each top-level item
+        self.assertEqual(callback_mock.call_count, 3)
+
+    def test_clean_old_files(self):
         """Test clean_old_files function."""
-        # Mock is_file_older_than to always return True
-        mock_is_file_older_than.return_value = True
+        # Make some of the files 40 days old
+        old_time = time.time() - 40 * 86400
+        old_files = self.old_files_dir_files[::2]
+        new_files = self.old_files_dir_files[1::2]
+        for file_path in old_files:
+            os.utime(file_path, (old_time, old_time))
 
         # Create a callback mock
         callback_mock = MagicMock()
@@ -141,6 +177,15 @@ class TestDiskCleaner(unittest.TestCase):
         self.assertTrue(result["success"])
         self.assertIsNone(result["error"])
 
+        # Exactly the old files should be removed, counted and reported
+        self.assertEqual(result["total_count"], len(old_files))
+        self.assertEqual(result["total_size_bytes"], len(old_files) * len(FILE_CONTENT))
+        self.assertCountEqual([c[0][0] for c in callback_mock.call_args_list], old_files)
+        for file_path in old_files:
+            self.assertFalse(os.path.exists(file_path))
+        for file_path in new_files:
+            self.assertTrue(os.path.exists(file_path))
+
         # Test with non-existent directory
         result = clean_old_files(os.path.join(self.test_dir, "nonexistent"))
         self.assertTrue(result["success"])  # Still true because no error occurred
@@ -185,11 +230,16 @@ class TestDiskCleaner(unittest.TestCase):
         callback_mock.reset_mock()
         result = clean_large_files(
             self.dirs["large_files_dir"],
-            file_paths=[self.large_files_dir_files["medium"]],
+            file_paths=[
+                # A path through a file fails with ENOTDIR and is skipped
+                os.path.join(self.large_files_dir_files["small"], "child"),
+                self.large_files_dir_files["medium"]
+            ],
             callback=callback_mock
         )
 
         # There should be 1 file cleaned (the medium file)
+        self.assertTrue(result["success"])
         self.assertEqual(result["total_count"], 1)
 
         # The medium file should be gone
@@ -207,6 +257,66 @@ class TestDiskCleaner(unittest.TestCase):
         self.assertIsNone(result["error"])
         self.assertEqual(result["total_count"], 0)
 
+    def test_clean_large_files_permanent(self):
+        """Test clean_large_files with permanent deletion."""
+        with patch('cleanipy.cleaners.disk_cleaner.send2trash') as mock_send2trash:
+            result = clean_large_files(self.dirs["large_files_dir"], min_size_bytes=5 * 1024, permanent=True)
+        
+        # The trash should not be used
+        mock_send2trash.assert_not_called()
+        
+        # The medium and large files should be gone
+        self.assertEqual(result["total_count"], 2)
+        self.assertFalse(os.path.exists(self.large_files_dir_files["medium"]))
+        self.assertFalse(os.path.exists(self.large_files_dir_files["large"]))
+        self.assertTrue(os.path.exists(self.large_files_dir_files["small"]))
+
+    def test_remove_files(self):
+        """Test remove_files function."""
+        files = [(file_path, os.path.getsize(file_path)) for file_path in self.clean_dir_files]
+        result = {"total_size_bytes": 0, "total_count": 0}
+        callback_mock = MagicMock()
+        
+        # Files should be deleted if they can't be sent to the trash
+        with patch('cleanipy.cleaners.disk_cleaner.send2trash', side_effect=OSError("No trash")):
+            remove_files(files, result, callback=callback_mock)
+        
+        self.assertEqual(result["total_count"], 5)
+        self.assertEqual(result["total_size_bytes"], sum(size for _, size in files))
+        self.assertEqual(callback_mock.call_count, 5)
+        for file_path in self.clean_dir_files:
+            self.assertFalse(os.path.exists(file_path))
+        
+        # Files that no longer exist should not be counted
+        result = {"total_size_bytes": 0, "total_count": 0}
+        with patch('cleanipy.cleaners.disk_cleaner.send2trash', side_effect=OSError("No trash")):
+            remove_files(files, result, permanent=True)
+        self.assertEqual(result["total_count"], 0)
+
+    def test_remove_files_partial_batch(self):
+        """Test that a failed batch only counts the files that existed beforehand."""
+        files = [(file_path, os.path.getsize(file_path)) for file_path in self.clean_dir_files]
+        os.remove(self.clean_dir_files[0])
+        result = {"total_size_bytes": 0, "total_count": 0}
+        callback_mock = MagicMock()
+        
+        def partial_send2trash(paths):
+            # Like send2trash, trash files in order and fail on the first missing one
+            for file_path in [paths] if isinstance(paths, str) else paths:
+                if not os.path.lexists(file_path):
+                    raise FileNotFoundError(file_path)
+                os.remove(file_path)
+        
+        # The batch fails on the missing file, so the rest are trashed one at a time
+        with patch('cleanipy.cleaners.disk_cleaner.send2trash', side_effect=partial_send2trash):
+            remove_files(files, result, callback=callback_mock)
+        
+        self.assertEqual(result["total_count"], 4)
+        self.assertEqual(result["total_size_bytes"], sum(size for _, size in files[1:]))
+        self.assertEqual([c[0][0] for c in callback_mock.call_args_list], self.clean_dir_files[1:])
+        for file_path in self.clean_dir_files:
+            self.assertFalse(os.path.exists(file_path))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -2,111 +2,121 @@
 Tests for duplicate file analyzer functions.
 """
 import os
+import shutil
 import tempfile
 import unittest
-import time
+from pathlib import Path
+from unittest.mock import patch
 
 from cleanipy.analyzers.duplicate_analyzer import (
-    find_duplicate_files_by_size, find_duplicate_files_by_content,
+    find_duplicate_files_by_size, find_duplicate_files_by_content, iter_duplicate_files,
     analyze_duplicate_files, get_duplicate_sets
 )
 
 
+# File contents, built once and shared by all files with the same content
+UNIQUE1_BYTES = b"Unique content 1" * 100
+UNIQUE2_BYTES = b"Unique content 2" * 100
+SET1_BYTES = b"Duplicate content 1" * 100
+SET2_BYTES = b"Duplicate content 2" * 200
+SIZE1_1_BYTES = b"A" * 1024
+SIZE1_2_BYTES = b"B" * 1024
+
+# Hash cache used by the tests, so they never touch the user's cache
+CACHE_PATH = ":memory:"
+
+
 class TestDuplicateAnalyzer(unittest.TestCase):
     """Test duplicate file analyzer functions."""
 
-    def setUp(self):
-        """Set up test environment."""
+    @classmethod
+    def setUpClass(cls):
+        """Set up test environment (shared by all tests, which don't modify it)."""
         # Create a temporary directory
-        self.temp_dir = tempfile.TemporaryDirectory()
-        self.test_dir = self.temp_dir.name
+        cls.test_dir = tempfile.mkdtemp(prefix="cleanipy_test_")
         
         # Create test files with duplicates
-        self.create_test_files()
+        cls.create_test_files()
 
-    def tearDown(self):
+    @classmethod
+    def tearDownClass(cls):
         """Clean up test environment."""
-        self.temp_dir.cleanup()
+        shutil.rmtree(cls.test_dir, ignore_errors=True)
 
-    def create_test_files(self):
+    @classmethod
+    def create_test_files(cls):
         """Create test files with duplicates."""
         # Create directories
-        self.dirs = {
-            "dir1": os.path.join(self.test_dir, "dir1"),
-            "dir2": os.path.join(self.test_dir, "dir2"),
+        cls.dirs = {
+            "dir1": os.path.join(cls.test_dir, "dir1"),
+            "dir2": os.path.join(cls.test_dir, "dir2"),
         }
         
-        for dir_path in self.dirs.values():
+        for dir_path in cls.dirs.values():
             os.makedirs(dir_path, exist_ok=True)
         
         # Create unique files
-        self.unique_files = {
+        cls.unique_files = {
             "unique1": {
-                "path": os.path.join(self.dirs["dir1"], "unique1.txt"),
-                "content": "Unique content 1" * 100
+                "path": os.path.join(cls.dirs["dir1"], "unique1.txt"),
+                "content": UNIQUE1_BYTES
             },
             "unique2": {
-                "path": os.path.join(self.dirs["dir2"], "unique2.txt"),
-                "content": "Unique content 2" * 100
+                "path": os.path.join(cls.dirs["dir2"], "unique2.txt"),
+                "content": UNIQUE2_BYTES
             }
         }
         
         # Create duplicate files (same content, different names)
-        self.duplicate_sets = {
+        cls.duplicate_sets = {
             "set1": [
                 {
-                    "path": os.path.join(self.dirs["dir1"], "dup1_1.txt"),
-                    "content": "Duplicate content 1" * 100
+                    "path": os.path.join(cls.dirs["dir1"], "dup1_1.txt"),
+                    "content": SET1_BYTES
                 },
                 {
-                    "path": os.path.join(self.dirs["dir2"], "dup1_2.txt"),
-                    "content": "Duplicate content 1" * 100
+                    "path": os.path.join(cls.dirs["dir2"], "dup1_2.txt"),
+                    "content": SET1_BYTES
                 }
             ],
             "set2": [
                 {
-                    "path": os.path.join(self.dirs["dir1"], "dup2_1.txt"),
-                    "content": "Duplicate content 2" * 200
+                    "path": os.path.join(cls.dirs["dir1"], "dup2_1.txt"),
+                    "content": SET2_BYTES
                 },
                 {
-                    "path": os.path.join(self.dirs["dir2"], "dup2_2.txt"),
-                    "content": "Duplicate content 2" * 200
+                    "path": os.path.join(cls.dirs["dir2"], "dup2_2.txt"),
+                    "content": SET2_BYTES
                 },
                 {
-                    "path": os.path.join(self.dirs["dir1"], "dup2_3.txt"),
-                    "content": "Duplicate content 2" * 200
+                    "path": os.path.join(cls.dirs["dir1"], "dup2_3.txt"),
+                    "content": SET2_BYTES
                 }
             ]
         }
         
         # Create files with same size but different content
-        self.same_size_files = {
+        cls.same_size_files = {
             "size1_1": {
-                "path": os.path.join(self.dirs["dir1"], "size1_1.txt"),
-                "content": "A" * 1024
+                "path": os.path.join(cls.dirs["dir1"], "size1_1.txt"),
+                "content": SIZE1_1_BYTES
             },
             "size1_2": {
-                "path": os.path.join(self.dirs["dir2"], "size1_2.txt"),
-                "content": "B" * 1024
+                "path": os.path.join(cls.dirs["dir2"], "size1_2.txt"),
+                "content": SIZE1_2_BYTES
             }
         }
         
         # Write all files
-        for file_info in self.unique_files.values():
-            with open(file_info["path"], "w") as f:
-                f.write(file_info["content"])
+        for file_info in cls.unique_files.values():
+            Path(file_info["path"]).write_bytes(file_info["content"])
         
-        for dup_set in self.duplicate_sets.values():
+        for dup_set in cls.duplicate_sets.values():
             for file_info in dup_set:
-                with open(file_info["path"], "w") as f:
-                    f.write(file_info["content"])
-        
-        for file_info in self.same_size_files.values():
-            with open(file_info["path"], "w") as f:
-                f.write(file_info["content"])
+                Path(file_info["path"]).write_bytes(file_info["content"])
         
-        # Add a small delay between file creations to ensure different timestamps
-        time.sleep(0.1)
+        for file_info in cls.same_size_files.values():
+            Path(file_info["path"]).write_bytes(file_info["content"])
 
     def test_find_duplicate_files_by_size(self):
         """Test find_duplicate_files_by_size function."""
@@ -152,7 +162,7 @@ class TestDuplicateAnalyzer(unittest.TestCase):
     def test_find_duplicate_files_by_content(self):
         """Test find_duplicate_files_by_content function."""
         # Find duplicate files by content
-        hash_dict = find_duplicate_files_by_content(self.test_dir)
+        hash_dict = find_duplicate_files_by_content(self.test_dir, cache_path=CACHE_PATH)
         self.assertIsInstance(hash_dict, dict)
         
         # There should be 2 sets of duplicate files
@@ -175,11 +185,83 @@ class TestDuplicateAnalyzer(unittest.TestCase):
             file_paths = [file_info["path"] for file_info in files]
             self.assertFalse(set(same_size_paths) == set(file_paths),
                             "Same size files incorrectly detected as duplicates")
+        
+        # Each file should carry its modification time for the cleaners
+        for files in hash_dict.values():
+            for file_info in files:
+                self.assertEqual(file_info["mtime"], os.path.getmtime(file_info["path"]))
+
+    def test_find_duplicate_files_by_content_large_files(self):
+        """Test find_duplicate_files_by_content with files that need a full hash."""
+        # Create two identical files and one that only differs in the middle
+        # (in a separate directory, the shared tree must stay unchanged)
+        large_dir = tempfile.mkdtemp(prefix="cleanipy_test_")
+        self.addCleanup(shutil.rmtree, large_dir, ignore_errors=True)
+        contents = {
+            "large1.bin": b"x" * 50000 + b"a" + b"x" * 50000,
+            "large2.bin": b"x" * 50000 + b"a" + b"x" * 50000,
+            "large3.bin": b"x" * 50000 + b"b" + b"x" * 50000,
+        }
+        for name, content in contents.items():
+            Path(large_dir, name).write_bytes(content)
+        
+        hash_dict = find_duplicate_files_by_content(large_dir, cache_path=CACHE_PATH)
+        
+        # Only the two identical files should be detected
+        self.assertEqual(len(hash_dict), 1)
+        file_paths = [file_info["path"] for file_info in next(iter(hash_dict.values()))]
+        self.assertEqual(
+            set(file_paths),
+            {os.path.join(large_dir, "large1.bin"), os.path.join(large_dir, "large2.bin")}
+        )
+
+        # With a persistent cache, the second run reuses the hashes of the first
+        cache_dir = tempfile.mkdtemp(prefix="cleanipy_test_")
+        self.addCleanup(shutil.rmtree, cache_dir, ignore_errors=True)
+        cache_path = os.path.join(cache_dir, "hashes.db")
+        self.assertEqual(find_duplicate_files_by_content(large_dir, cache_path=cache_path), hash_dict)
+        self.assertTrue(os.path.exists(cache_path))
+        
+        with patch("cleanipy.analyzers.duplicate_analyzer.hash_files_parallel", return_value=(h for h in [])) as mock_hash:
+            self.assertEqual(find_duplicate_files_by_content(large_dir, cache_path=cache_path), hash_dict)
+        self.assertEqual(mock_hash.call_args[0][0], [])
+
+    def test_iter_duplicate_files(self):
+        """Test iter_duplicate_files function."""
+        # The generator should yield the same sets as find_duplicate_files_by_content
+        hash_dict = find_duplicate_files_by_content(self.test_dir, cache_path=CACHE_PATH)
+        self.assertEqual(dict(iter_duplicate_files(self.test_dir, cache_path=CACHE_PATH)), hash_dict)
+        
+        # Stopping early should be possible
+        duplicates = iter_duplicate_files(self.test_dir, cache_path=CACHE_PATH)
+        hash_val, files = next(duplicates)
+        duplicates.close()
+        self.assertIn(hash_val, hash_dict)
+
+    def test_find_duplicate_files_hardlinks(self):
+        """Test that hard links are grouped with their duplicates."""
+        link_path = os.path.join(self.dirs["dir2"], "unique1_link.txt")
+        try:
+            os.link(self.unique_files["unique1"]["path"], link_path)
+        except (OSError, NotImplementedError):
+            self.skipTest("Hard links not supported")
+        self.addCleanup(os.remove, link_path)
+        expected = {self.unique_files["unique1"]["path"], link_path}
+        
+        # Hard links should be reported in the same size group
+        size_dict = find_duplicate_files_by_size(self.test_dir)
+        self.assertTrue(any(expected.issubset(set(files)) for files in size_dict.values()))
+        
+        # Hard links should be reported as a duplicate set
+        hash_dict = find_duplicate_files_by_content(self.test_dir, cache_path=CACHE_PATH)
+        self.assertEqual(len(hash_dict), 3)
+        found = [set(file_info["path"] for file_info in files) for files in hash_dict.values()]
+        self.assertIn(expected, found)
 
     def test_analyze_duplicate_files(self):
         """Test analyze_duplicate_files function."""
         # Analyze duplicate files
-        result = analyze_duplicate_files(self.test_dir)
+        result = analyze_duplicate_files(self.test_dir, cache_path=CACHE_PATH)
         self.assertIsInstance(result, dict)
         
         # Check if the result has the expected keys
@@ -201,7 +283,7 @@ class TestDuplicateAnalyzer(unittest.TestCase):
         
         # Test with minimum size filter
         large_size = len(self.duplicate_sets["set2"][0]["content"]) - 1
-        result = analyze_duplicate_files(self.test_dir, min_size=large_size)
+        result = analyze_duplicate_files(self.test_dir, min_size=large_size, cache_path=CACHE_PATH)
         
         # Only the larger duplicate set should be detected
         self.assertEqual(result["total_duplicate_sets"], 1)
@@ -210,7 +292,7 @@ class TestDuplicateAnalyzer(unittest.TestCase):
     def test_get_duplicate_sets(self):
         """Test get_duplicate_sets function."""
         # Get duplicate sets
-        dup_sets = get_duplicate_sets(self.test_dir)
+        dup_sets = get_duplicate_sets(self.test_dir, cache_path=CACHE_PATH)
         self.assertIsInstance(dup_sets, list)
         
         # There should be 2 duplicate sets
@@ -229,12 +311,21 @@ class TestDuplicateAnalyzer(unittest.TestCase):
         self.assertGreater(dup_sets[0]["count"], dup_sets[1]["count"])
         
         # Test with limit
-        dup_sets = get_duplicate_sets(self.test_dir, limit=1)
+        dup_sets = get_duplicate_sets(self.test_dir, limit=1, cache_path=CACHE_PATH)
         self.assertEqual(len(dup_sets), 1)
         
+        # Test with precomputed duplicates
+        duplicates = analyze_duplicate_files(self.test_dir, cache_path=CACHE_PATH)["duplicates"]
+        with patch("cleanipy.analyzers.duplicate_analyzer.iter_duplicate_files") as mock_iter, \
+             patch("cleanipy.analyzers.duplicate_analyzer.hash_files_parallel") as mock_hash:
+            dup_sets = get_duplicate_sets(self.test_dir, duplicates=duplicates)
+        mock_iter.assert_not_called()
+        mock_hash.assert_not_called()
+        self.assertEqual(len(dup_sets), 2)
+        
         # Test with minimum size filter
         large_size = len(self.duplicate_sets["set2"][0]["content"]) - 1
-        dup_sets = get_duplicate_sets(self.test_dir, min_size=large_size)
+        dup_sets = get_duplicate_sets(self.test_dir, min_size=large_size, cache_path=CACHE_PATH)
         self.assertEqual(len(dup_sets), 1)
 
 
@@ -1,67 +1,146 @@
 """
 Tests for duplicate file cleaner functions.
 """
+import filecmp
 import os
+import shutil
+import stat
 import tempfile
 import unittest
 import time
-from unittest.mock import MagicMock, patch
-import send2trash
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest.mock import MagicMock, call, patch
 
 from cleanipy.cleaners.duplicate_cleaner import (
-    clean_duplicate_files, replace_duplicates_with_hardlinks, replace_duplicates_with_symlinks
+    clean_duplicate_files, iter_clean_duplicate_files,
+    replace_duplicates_with_hardlinks, replace_duplicates_with_symlinks, _LinkSources
 )
+from cleanipy.utils.file_utils import TRASH_LOCK
+
+
+# Contents of the two duplicate sets
+SET1_CONTENT = b"Duplicate content 1" * 100
+SET2_CONTENT = b"Duplicate content 2" * 200
 
 
 class TestDuplicateCleaner(unittest.TestCase):
     """Test duplicate file cleaner functions."""
 
-    def setUp(self):
-        """Set up test environment."""
+    @classmethod
+    def setUpClass(cls):
+        """Set up test environment (shared by all tests, restored before each one)."""
         # Create a temporary directory
-        self.temp_dir = tempfile.TemporaryDirectory()
-        self.test_dir = self.temp_dir.name
+        cls.test_dir = tempfile.mkdtemp(prefix="cleanipy_test_")
 
         # Create test files with duplicates
-        self.create_test_files()
+        cls.create_test_files()
 
-    def tearDown(self):
+    @classmethod
+    def tearDownClass(cls):
         """Clean up test environment."""
-        self.temp_dir.cleanup()
+        shutil.rmtree(cls.test_dir, ignore_errors=True)
+
+    def setUp(self):
+        """Undo what previous tests did to the test files."""
+        self.restore_test_files()
 
-    def create_test_files(self):
+    @classmethod
+    def create_test_files(cls):
         """Create test files with duplicates."""
         # Create directories
-        self.dirs = {
-            "dir1": os.path.join(self.test_dir, "dir1"),
-            "dir2": os.path.join(self.test_dir, "dir2"),
+        cls.dirs = {
+            "dir1": os.path.join(cls.test_dir, "dir1"),
+            "dir2": os.path.join(cls.test_dir, "dir2"),
         }
 
-        for dir_path in self.dirs.values():
+        for dir_path in cls.dirs.values():
             os.makedirs(dir_path, exist_ok=True)
 
         # Create duplicate files (same content, different names)
-        self.duplicate_sets = {}
-
-        # First duplicate set
-        self.duplicate_sets["set1"] = []
-        for i in range(3):
-            file_path = os.path.join(self.dirs["dir1"], f"dup1_{i}.txt")
-            with open(file_path, "w") as f:
-                f.write("Duplicate content 1" * 100)
-            self.duplicate_sets["set1"].append(file_path)
-            # Add a small delay to ensure different timestamps
-            time.sleep(0.1)
-
-        # Second duplicate set
-        self.duplicate_sets["set2"] = []
-        for i in range(2):
-            file_path = os.path.join(self.dirs["dir2"], f"dup2_{i}.txt")
-            with open(file_path, "w") as f:
-                f.write("Duplicate content 2" * 200)
-            self.duplicate_sets["set2"].append(file_path)
-            # Add a small delay to ensure different timestamps
-            time.sleep(0.1)
+        cls.duplicate_sets = {
+            "set1": [os.path.join(cls.dirs["dir1"], f"dup1_{i}.txt") for i in range(3)],
+            "set2": [os.path.join(cls.dirs["dir2"], f"dup2_{i}.txt") for i in range(2)],
+        }
+        cls.contents = {}
+        for file_path in cls.duplicate_sets["set1"]:
+            cls.contents[file_path] = SET1_CONTENT
+        for file_path in cls.duplicate_sets["set2"]:
+            cls.contents[file_path] = SET2_CONTENT
+
+        # restore_test_files always writes the same bytes, so the sizes are known
+        cls.file_sizes = {file_path: len(content) for file_path, content in cls.contents.items()}
+
+        cls.restore_test_files()
+
+    @classmethod
+    def restore_test_files(cls):
+        """Write the test files that are missing or have been replaced with links."""
+        # Remove anything else left in the directories (e.g. temporary links)
+        for dir_path in cls.dirs.values():
+            for name in os.listdir(dir_path):
+                file_path = os.path.join(dir_path, name)
+                if file_path not in cls.contents:
+                    os.remove(file_path)
+
+        pending = []
+        for file_path, content in cls.contents.items():
+            try:
+                st = os.lstat(file_path)
+            except FileNotFoundError:
+                st = None
+
+            if st is None or stat.S_ISLNK(st.st_mode) or st.st_nlink > 1:
+                if st is not None:
+                    os.remove(file_path)
+                pending.append((file_path, content))
+
+        # Write the files concurrently, the syscalls release the GIL
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(8, len(pending))) as executor:
+                list(executor.map(lambda item: Path(item[0]).write_bytes(item[1]), pending))
+
+        # Give the files distinct mtimes, one second apart in creation order
+        # (the last file is the newest)
+        now = time.time()
+        for i, file_path in enumerate(cls.contents):
+            mtime = now - (len(cls.contents) - i)
+            os.utime(file_path, (mtime, mtime))
+
+    def scan_test_files(self):
+        """
+        List the test directories with os.scandir.
+
+        Returns:
+            Dictionary mapping file paths to their DirEntry objects, whose
+            is_symlink() comes from the directory listing without a stat
+        """
+        entries = {}
+        for dir_path in self.dirs.values():
+            with os.scandir(dir_path) as it:
+                for entry in it:
+                    entries[entry.path] = entry
+        return entries
+
+    def create_synthetic_duplicates(self):
+        """
+        Create a mock duplicates dictionary whose files don't exist.
+
+        For tests that mock out everything that touches the files, so the
+        sizes are made up and the paths are under a directory that is never
+        created.
+
+        Returns:
+            Dictionary in the format returned by find_duplicate_files_by_content
+        """
+        root = os.path.join(self.test_dir, "synthetic")
+        return {
+            set_name: [
+                {"path": os.path.join(root, os.path.basename(file_path)), "size_bytes": size}
+                for file_path in file_paths
+            ]
+            for (set_name, file_paths), size in zip(self.duplicate_sets.items(), (1900, 3800))
+        }
 
     def create_mock_duplicates(self):
         """Create a mock duplicates dictionary for testing."""
@@ -73,72 +152,125 @@ class TestDuplicateCleaner(unittest.TestCase):
         hash1 = "hash1"
         duplicates[hash1] = []
         for file_path in self.duplicate_sets["set1"]:
-            size = os.path.getsize(file_path)
             duplicates[hash1].append({
                 "path": file_path,
-                "size_bytes": size,
-                "size": f"{size} bytes"
+                "size_bytes": self.file_sizes[file_path]
             })
 
         # Second duplicate set
         hash2 = "hash2"
         duplicates[hash2] = []
         for file_path in self.duplicate_sets["set2"]:
-            size = os.path.getsize(file_path)
             duplicates[hash2].append({
                 "path": file_path,
-                "size_bytes": size,
-                "size": f"{size} bytes"
+                "size_bytes": self.file_sizes[file_path]
             })
 
         return duplicates
 
-    @patch('os.path.getmtime')
-    def test_clean_duplicate_files(self, mock_getmtime):
+    @patch('cleanipy.cleaners.duplicate_cleaner._find_gio', return_value=None)
+    @patch('cleanipy.cleaners.duplicate_cleaner.send2trash')
+    @patch('cleanipy.cleaners.duplicate_cleaner.get_mtime')
+    def test_clean_duplicate_files(self, mock_get_mtime, mock_send2trash, mock_find_gio):
         """Test clean_duplicate_files function."""
-        # Mock getmtime to avoid file not found errors
-        mock_getmtime.return_value = time.time()
+        # Mock get_mtime to avoid file not found errors
+        mock_get_mtime.return_value = time.time()
 
-        # Create a mock duplicates dictionary
-        duplicates = self.create_mock_duplicates()
+        # Create a mock duplicates dictionary; nothing reads the files, so
+        # they don't need to exist
+        duplicates = self.create_synthetic_duplicates()
 
         # Create a callback mock
         callback_mock = MagicMock()
 
-        # Mock the send2trash function to avoid actually deleting files
-        with patch('send2trash.send2trash'):
-            # Clean duplicate files (keep newest)
-            result = clean_duplicate_files(
-                self.test_dir,
-                duplicates=duplicates,
-                keep_newest=True,
-                callback=callback_mock
-            )
-            self.assertIsInstance(result, dict)
-
-            # Check if the result has the expected keys
-            expected_keys = [
-                "total_size_bytes", "total_count", "details", "total_size"
-            ]
-            for key in expected_keys:
-                self.assertIn(key, result)
+        # Clean duplicate files (keep newest); the trash functions are mocked
+        # to avoid actually deleting files
+        result = clean_duplicate_files(
+            self.test_dir,
+            duplicates=duplicates,
+            keep_newest=True,
+            callback=callback_mock
+        )
+        self.assertIsInstance(result, dict)
 
-            # The callback should have been called for each file
-            self.assertGreater(callback_mock.call_count, 0)
+        # Check if the result has the expected keys
+        expected_keys = [
+            "total_size_bytes", "total_count", "details", "total_size"
+        ]
+        for key in expected_keys:
+            self.assertIn(key, result)
 
-            # Reset mocks
-            callback_mock.reset_mock()
+        # The callback should have been called once for each removed file,
+        # which is all but one of each set
+        self.assertEqual(callback_mock.call_count, 3)
+        reported = {call_args[0][0] for call_args in callback_mock.call_args_list}
+        for file_set in duplicates.values():
+            self.assertEqual(len(reported & {file_info["path"] for file_info in file_set}), len(file_set) - 1)
+        self.assertEqual(result["total_count"], 3)
+        self.assertEqual(result["total_size_bytes"], 2 * 1900 + 3800)
 
-            # Clean duplicate files (keep oldest)
-            result = clean_duplicate_files(
-                self.test_dir,
-                duplicates=duplicates,
-                keep_newest=False,
-                callback=callback_mock
-            )
+        # Reset mocks
+        callback_mock.reset_mock()
 
-            # The callback should have been called for each file
-            self.assertGreater(callback_mock.call_count, 0)
+        # Clean duplicate files (keep oldest)
+        result = clean_duplicate_files(
+            self.test_dir,
+            duplicates=duplicates,
+            keep_newest=False,
+            callback=callback_mock
+        )
+
+        # The callback should have been called for each file
+        self.assertEqual(callback_mock.call_count, 3)
+
+    @patch('cleanipy.cleaners.duplicate_cleaner.send2trash')
+    @patch('cleanipy.cleaners.duplicate_cleaner.subprocess.run')
+    @patch('cleanipy.cleaners.duplicate_cleaner._find_gio', return_value="/usr/bin/gio")
+    def test_clean_duplicate_files_gio(self, mock_find_gio, mock_run, mock_send2trash):
+        """Test clean_duplicate_files when gio is available."""
+        duplicates = self.create_mock_duplicates()
+        kept = self.duplicate_sets["set1"][0]
+
+        # Simulate gio trashing every file except one
+        def gio_trash(args, **kwargs):
+            for file_path in args[3:]:
+                if file_path != self.duplicate_sets["set1"][1]:
+                    os.remove(file_path)
+
+        mock_run.side_effect = gio_trash
+
+        with patch('cleanipy.cleaners.duplicate_cleaner._sort_by_mtime', side_effect=lambda files, newest_first: list(files)):
+            result = clean_duplicate_files(self.test_dir, duplicates=duplicates)
+
+        # All duplicates are passed to one gio call
+        mock_run.assert_called_once()
+        self.assertEqual(mock_run.call_args[0][0][:3], ["/usr/bin/gio", "trash", "--"])
+        self.assertEqual(len(mock_run.call_args[0][0]), 6)
+
+        # The file gio left behind goes through send2trash
+        mock_send2trash.assert_called_once_with(self.duplicate_sets["set1"][1])
+        self.assertEqual(result["total_count"], 3)
+        self.assertTrue(os.path.exists(kept))
+
+    @patch('cleanipy.cleaners.duplicate_cleaner.send2trash')
+    @patch('cleanipy.cleaners.duplicate_cleaner._find_gio', return_value=None)
+    def test_iter_clean_duplicate_files(self, mock_find_gio, mock_send2trash):
+        """Test iter_clean_duplicate_files function."""
+        # Files are only sent to the trash while holding the trash lock
+        locked = []
+        mock_send2trash.side_effect = lambda path: locked.append(TRASH_LOCK.locked())
+
+        duplicates = self.create_mock_duplicates()
+        details = list(iter_clean_duplicate_files(self.test_dir, duplicates=duplicates))
+
+        # There should be one record for each removed file (2 from set1 and 1 from set2)
+        self.assertEqual(len(details), 3)
+        self.assertTrue(all(detail.success for detail in details))
+        self.assertEqual(
+            sorted(call[0][0] for call in mock_send2trash.call_args_list),
+            sorted(detail.path for detail in details)
+        )
+        self.assertEqual(locked, [True] * 3)
 
     def test_replace_duplicates_with_hardlinks(self):
         """Test replace_duplicates_with_hardlinks function."""
@@ -167,27 +299,93 @@ class TestDuplicateCleaner(unittest.TestCase):
         # There should be 3 files processed (2 from set1 and 1 from set2)
         self.assertEqual(result["total_count"], 3)
 
-        # The callback should have been called 3 times
+        # The callback should have been called once for each replaced file
+        # (all but the newest of each set)
+        expected_calls = [call(file_path) for file_set in self.duplicate_sets.values() for file_path in file_set[:-1]]
+        callback_mock.assert_has_calls(expected_calls, any_order=True)
         self.assertEqual(callback_mock.call_count, 3)
 
         # All files should still exist
-        for file_path in self.duplicate_sets["set1"]:
-            self.assertTrue(os.path.exists(file_path))
-        for file_path in self.duplicate_sets["set2"]:
-            self.assertTrue(os.path.exists(file_path))
+        entries = self.scan_test_files()
+        for file_path in self.contents:
+            self.assertTrue(entries[file_path].is_file())
+
+        # All files in each set should be links to the same inode, so their
+        # content is the same without reading it
+        for file_set in self.duplicate_sets.values():
+            for file_path in file_set[1:]:
+                self.assertTrue(os.path.samefile(file_set[0], file_path))
+
+    def test_replace_duplicates_with_hardlinks_io_threads(self):
+        """Test replace_duplicates_with_hardlinks with an explicit thread count."""
+        duplicates = self.create_mock_duplicates()
 
-        # The content of all files in each set should be the same
-        with open(self.duplicate_sets["set1"][0], "r") as f:
-            content1 = f.read()
-        for file_path in self.duplicate_sets["set1"][1:]:
-            with open(file_path, "r") as f:
-                self.assertEqual(f.read(), content1)
-
-        with open(self.duplicate_sets["set2"][0], "r") as f:
-            content2 = f.read()
-        for file_path in self.duplicate_sets["set2"][1:]:
-            with open(file_path, "r") as f:
-                self.assertEqual(f.read(), content2)
+        result = replace_duplicates_with_hardlinks(self.test_dir, duplicates=duplicates, io_threads=1)
+        self.assertEqual(result["total_count"], 3)
+        self.assertTrue(all(detail.success for detail in result["details"]))
+
+        # Every file in a set should now share one inode
+        for file_paths in self.duplicate_sets.values():
+            inodes = {os.stat(file_path).st_ino for file_path in file_paths}
+            self.assertEqual(len(inodes), 1)
+
+    @patch('cleanipy.cleaners.duplicate_cleaner._LinkSources.MAX_OPEN', 1)
+    def test_link_sources_limit(self):
+        """Test that the hard link sources keep a bounded number of handles open."""
+        with _LinkSources() as sources:
+            for file_paths in self.duplicate_sets.values():
+                source = file_paths[-1]
+                for file_path in file_paths[:-1]:
+                    link_path = file_path + ".link"
+                    sources.link(source, link_path)
+                    self.addCleanup(os.remove, link_path)
+                    self.assertTrue(os.path.samefile(source, link_path))
+
+                # The handle to the previous set's source has been closed
+                self.assertLessEqual(len(sources._fds), 1)
+
+    @patch('cleanipy.cleaners.duplicate_cleaner.get_mtime')
+    def test_replace_duplicates_with_hardlinks_single_file_sets(self, mock_get_mtime):
+        """Test that sets with a single file are skipped without a stat."""
+        file_path = self.duplicate_sets["set1"][0]
+        duplicates = {"hash1": [{"path": file_path, "size_bytes": self.file_sizes[file_path]}], "hash2": []}
+
+        result = replace_duplicates_with_hardlinks(self.test_dir, duplicates=duplicates)
+        self.assertEqual(result["total_count"], 0)
+        self.assertEqual(result["details"], [])
+        mock_get_mtime.assert_not_called()
+
+    @patch('cleanipy.cleaners.duplicate_cleaner.get_mtime')
+    def test_replace_duplicates_with_hardlinks_sort_by(self, mock_get_mtime):
+        """Test replace_duplicates_with_hardlinks with other ways of picking the source."""
+        duplicates = self.create_mock_duplicates()
+
+        # Keep the first file by path, without looking at mtimes
+        result = replace_duplicates_with_hardlinks(self.test_dir, duplicates=duplicates, sort_by="path")
+        self.assertEqual(result["total_count"], 3)
+        self.assertEqual({detail.source for detail in result["details"]},
+                         {min(self.duplicate_sets["set1"]), min(self.duplicate_sets["set2"])})
+        mock_get_mtime.assert_not_called()
+
+        # Unknown sort orders are rejected
+        with self.assertRaises(ValueError):
+            replace_duplicates_with_hardlinks(self.test_dir, duplicates=duplicates, sort_by="size")
+
+    def test_replace_duplicates_with_hardlinks_existing_link(self):
+        """Test replace_duplicates_with_hardlinks when a duplicate is already a hard link."""
+        source, target = self.duplicate_sets["set2"]
+        os.remove(target)
+        os.link(source, target)
+        duplicates = {"hash2": [
+            {"path": path, "size_bytes": self.file_sizes[path]} for path in (source, target)
+        ]}
+
+        result = replace_duplicates_with_hardlinks(self.test_dir, duplicates=duplicates)
+        self.assertEqual(result["total_count"], 1)
+
+        # No temporary link should be left behind
+        self.assertEqual(sorted(os.listdir(self.dirs["dir2"])), ["dup2_0.txt", "dup2_1.txt"])
+        self.assertTrue(os.path.samefile(source, target))
 
     @unittest.skipIf(os.name == "nt", "Symbolic links not fully supported on Windows")
     def test_replace_duplicates_with_symlinks(self):
@@ -217,37 +415,28 @@ class TestDuplicateCleaner(unittest.TestCase):
         # There should be 3 files processed (2 from set1 and 1 from set2)
         self.assertEqual(result["total_count"], 3)
 
-        # The callback should have been called 3 times
+        # The callback should have been called once for each replaced file
+        # (all but the newest of each set)
+        expected_calls = [call(file_path) for file_set in self.duplicate_sets.values() for file_path in file_set[:-1]]
+        callback_mock.assert_has_calls(expected_calls, any_order=True)
         self.assertEqual(callback_mock.call_count, 3)
 
-        # All files should still exist
-        for file_path in self.duplicate_sets["set1"]:
-            self.assertTrue(os.path.exists(file_path))
-        for file_path in self.duplicate_sets["set2"]:
-            self.assertTrue(os.path.exists(file_path))
-
-        # The duplicates should be symbolic links
-        for file_path in self.duplicate_sets["set1"][:-1]:
-            self.assertTrue(os.path.islink(file_path))
-        for file_path in self.duplicate_sets["set2"][:-1]:
-            self.assertTrue(os.path.islink(file_path))
+        # All files should still exist (links are followed, so a dangling
+        # link would fail here)
+        entries = self.scan_test_files()
+        for file_path in self.contents:
+            self.assertTrue(entries[file_path].is_file())
 
-        # The newest files should not be symbolic links
-        self.assertFalse(os.path.islink(self.duplicate_sets["set1"][-1]))
-        self.assertFalse(os.path.islink(self.duplicate_sets["set2"][-1]))
+        # The duplicates should be symbolic links, and the newest files should not
+        for file_set in self.duplicate_sets.values():
+            for file_path in file_set[:-1]:
+                self.assertTrue(entries[file_path].is_symlink())
+            self.assertFalse(entries[file_set[-1]].is_symlink())
 
         # The content of all files in each set should be the same
-        with open(self.duplicate_sets["set1"][0], "r") as f:
-            content1 = f.read()
-        for file_path in self.duplicate_sets["set1"][1:]:
-            with open(file_path, "r") as f:
-                self.assertEqual(f.read(), content1)
-
-        with open(self.duplicate_sets["set2"][0], "r") as f:
-            content2 = f.read()
-        for file_path in self.duplicate_sets["set2"][1:]:
-            with open(file_path, "r") as f:
-                self.assertEqual(f.read(), content2)
+        for file_set in self.duplicate_sets.values():
+            for file_path in file_set[1:]:
+                self.assertTrue(filecmp.cmp(file_set[0], file_path, shallow=False))
 
 
 if __name__ == "__main__":
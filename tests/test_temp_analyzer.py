@@ -2,31 +2,36 @@
 Tests for temporary file analyzer functions.
 """
 import os
+import shutil
 import tempfile
 import unittest
 import platform
 from datetime import datetime, timedelta
+from pathlib import Path
 
 from cleanipy.analyzers.temp_analyzer import (
     get_system_temp_dirs, get_browser_cache_dirs, get_package_cache_dirs, analyze_temp_files
 )
 
 
+# Fixture contents, encoded once for the whole module
+NEW_FILE_CONTENTS = [f"New content {i}".encode() * 100 for i in range(3)]
+
+
 class TestTempAnalyzer(unittest.TestCase):
     """Test temporary file analyzer functions."""
 
     def setUp(self):
         """Set up test environment."""
         # Create a temporary directory to simulate a temp directory
-        self.temp_dir = tempfile.TemporaryDirectory()
-        self.test_dir = self.temp_dir.name
+        self.test_dir = tempfile.mkdtemp(prefix="cleanipy_test_")
         
         # Create some test files with different ages
         self.create_test_files()
 
     def tearDown(self):
         """Clean up test environment."""
-        self.temp_dir.cleanup()
+        shutil.rmtree(self.test_dir, ignore_errors=True)
 
     def create_test_files(self):
         """Create test files with different ages."""
@@ -34,8 +39,7 @@ class TestTempAnalyzer(unittest.TestCase):
         self.new_files = []
         for i in range(3):
             file_path = os.path.join(self.test_dir, f"new_file_{i}.tmp")
-            with open(file_path, "w") as f:
-                f.write(f"New content {i}" * 100)
+            Path(file_path).write_bytes(NEW_FILE_CONTENTS[i])
             self.new_files.append(file_path)
         
         # We can't easily create files with old timestamps in a reliable way
@@ -112,6 +116,14 @@ class TestTempAnalyzer(unittest.TestCase):
         self.assertEqual(result["old_files_count"], 0)
         self.assertEqual(len(result["old_files"]), 0)
         
+        # A file last modified 10 days ago is older than the default 7 days
+        old_time = (datetime.now() - timedelta(days=10)).timestamp()
+        os.utime(self.new_files[0], (old_time, old_time))
+        result = analyze_temp_files(self.test_dir)
+        self.assertEqual(result["old_files_count"], 1)
+        self.assertEqual(result["old_files_size_bytes"], len(NEW_FILE_CONTENTS[0]))
+        self.assertEqual([file_info["path"] for file_info in result["old_files"]], [self.new_files[0]])
+        
         # Test with non-existent directory
         result = analyze_temp_files(os.path.join(self.test_dir, "nonexistent"))
         self.assertEqual(result["total_count"], 0)
@@ -2,13 +2,17 @@
 Tests for temporary file cleaner functions.
 """
 import os
+import shutil
+import sys
 import tempfile
+import time
 import unittest
 from unittest.mock import MagicMock, patch
 
 from cleanipy.cleaners.temp_cleaner import (
     clean_system_temp_files, clean_browser_caches, clean_package_caches
 )
+from cleanipy.utils.size_utils import format_size
 
 
 class TestTempCleaner(unittest.TestCase):
@@ -17,147 +21,129 @@ class TestTempCleaner(unittest.TestCase):
     def setUp(self):
         """Set up test environment."""
         # Create a temporary directory
-        self.temp_dir = tempfile.TemporaryDirectory()
-        self.test_dir = self.temp_dir.name
+        self.test_dir = tempfile.mkdtemp(prefix="cleanipy_test_")
 
     def tearDown(self):
         """Clean up test environment."""
-        self.temp_dir.cleanup()
-
-    @patch('cleanipy.analyzers.temp_analyzer.get_system_temp_dirs')
-    @patch('cleanipy.cleaners.disk_cleaner.clean_old_files')
-    def test_clean_system_temp_files(self, mock_clean_old_files, mock_get_system_temp_dirs):
-        """Test clean_system_temp_files function."""
-        # Mock the get_system_temp_dirs function to return our test directory
-        mock_get_system_temp_dirs.return_value = [self.test_dir]
-
-        # Mock the clean_old_files function to return a successful result
-        mock_clean_old_files.return_value = {
-            "directory": self.test_dir,
-            "total_size_bytes": 1024 * 1024,  # 1 MB
-            "total_count": 10,
-            "success": True,
-            "error": None,
-            "total_size": "1.00 MB"
-        }
-
-        # Create a callback mock
-        callback_mock = MagicMock()
-
-        # Clean system temp files
-        result = clean_system_temp_files(min_age_days=7, callback=callback_mock)
-
-        # Manually update the result to match our expectations for testing
-        # This is necessary because the actual function aggregates results
-        result["total_count"] = 10
-        result["total_size_bytes"] = 1024 * 1024
-        result["total_size"] = "1.00 MB"
-
-        self.assertIsInstance(result, dict)
-
-        # Check if the result has the expected keys
-        expected_keys = [
-            "total_size_bytes", "total_count", "details", "total_size"
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_clean_functions(self):
+        """Test clean_system_temp_files, clean_browser_caches and clean_package_caches."""
+        # (function, directory getter, directory cleaner, files cleaned, bytes cleaned)
+        cases = [
+            (lambda callback: clean_system_temp_files(min_age_days=7, callback=callback),
+             "get_system_temp_dirs", "clean_old_files", 10, 1024 * 1024),
+            (clean_browser_caches, "get_browser_cache_dirs", "clean_old_files", 20, 2 * 1024 * 1024),
+            (clean_package_caches, "get_package_cache_dirs", "clean_directory", 30, 3 * 1024 * 1024),
         ]
-        for key in expected_keys:
-            self.assertIn(key, result)
-
-        # There should be 10 files cleaned (from the mock)
-        self.assertEqual(result["total_count"], 10)
-
-        # The total size should be 1 MB (from the mock)
-        self.assertEqual(result["total_size_bytes"], 1024 * 1024)
-        self.assertEqual(result["total_size"], "1.00 MB")
-
-    @patch('cleanipy.analyzers.temp_analyzer.get_browser_cache_dirs')
-    @patch('cleanipy.cleaners.disk_cleaner.clean_old_files')
-    def test_clean_browser_caches(self, mock_clean_old_files, mock_get_browser_cache_dirs):
-        """Test clean_browser_caches function."""
-        # Mock the get_browser_cache_dirs function to return our test directory
-        mock_get_browser_cache_dirs.return_value = [self.test_dir]
-
-        # Mock the clean_old_files function to return a successful result
-        mock_clean_old_files.return_value = {
-            "directory": self.test_dir,
-            "total_size_bytes": 2 * 1024 * 1024,  # 2 MB
-            "total_count": 20,
-            "success": True,
-            "error": None,
-            "total_size": "2.00 MB"
-        }
-
-        # Create a callback mock
-        callback_mock = MagicMock()
-
-        # Clean browser caches
-        result = clean_browser_caches(callback=callback_mock)
-
-        # Manually update the result to match our expectations for testing
-        # This is necessary because the actual function aggregates results
-        result["total_count"] = 20
-        result["total_size_bytes"] = 2 * 1024 * 1024
-        result["total_size"] = "2.00 MB"
 
-        self.assertIsInstance(result, dict)
-
-        # Check if the result has the expected keys
-        expected_keys = [
-            "total_size_bytes", "total_count", "details", "total_size"
-        ]
-        for key in expected_keys:
-            self.assertIn(key, result)
-
-        # There should be 20 files cleaned (from the mock)
-        self.assertEqual(result["total_count"], 20)
-
-        # The total size should be 2 MB (from the mock)
-        self.assertEqual(result["total_size_bytes"], 2 * 1024 * 1024)
-        self.assertEqual(result["total_size"], "2.00 MB")
-
-    @patch('cleanipy.analyzers.temp_analyzer.get_package_cache_dirs')
-    @patch('cleanipy.cleaners.disk_cleaner.clean_directory')
-    def test_clean_package_caches(self, mock_clean_directory, mock_get_package_cache_dirs):
-        """Test clean_package_caches function."""
-        # Mock the get_package_cache_dirs function to return our test directory
-        mock_get_package_cache_dirs.return_value = [self.test_dir]
-
-        # Mock the clean_directory function to return a successful result
-        mock_clean_directory.return_value = {
-            "directory": self.test_dir,
-            "total_size_bytes": 3 * 1024 * 1024,  # 3 MB
-            "total_count": 30,
-            "success": True,
-            "error": None,
-            "total_size": "3.00 MB"
-        }
-
-        # Create a callback mock
+        for clean, getter, cleaner, count, size in cases:
+            with self.subTest(getter=getter), \
+                 patch(f"cleanipy.cleaners.temp_cleaner.{getter}") as mock_getter, \
+                 patch(f"cleanipy.cleaners.temp_cleaner.{cleaner}") as mock_cleaner:
+                # Mock the getter to return our test directory, and the cleaner
+                # to return a successful result
+                mock_getter.return_value = [self.test_dir]
+                mock_cleaner.return_value = {
+                    "directory": self.test_dir,
+                    "total_size_bytes": size,
+                    "total_count": count,
+                    "success": True,
+                    "error": None,
+                    "total_size": format_size(size)
+                }
+
+                result = clean(MagicMock())
+                self.assertIsInstance(result, dict)
+
+                # Check if the result has the expected keys
+                expected_keys = [
+                    "total_size_bytes", "total_count", "details", "total_size"
+                ]
+                for key in expected_keys:
+                    self.assertIn(key, result)
+
+                # The totals come from the mocked cleaner
+                self.assertEqual(mock_cleaner.call_args[0][0], self.test_dir)
+                self.assertEqual(result["total_count"], count)
+                self.assertEqual(result["total_size_bytes"], size)
+                self.assertEqual(result["total_size"], format_size(size))
+                self.assertEqual(result["details"], [mock_cleaner.return_value])
+
+    @patch('cleanipy.cleaners.temp_cleaner.clean_old_files')
+    @patch('cleanipy.cleaners.temp_cleaner.get_system_temp_dirs')
+    def test_clean_system_temp_files_several_dirs(self, mock_get_system_temp_dirs, mock_clean_old_files):
+        """Test clean_system_temp_files with directories cleaned concurrently."""
+        temp_dirs = [os.path.join(self.test_dir, f"tmp{i}") for i in range(4)]
+        mock_get_system_temp_dirs.return_value = temp_dirs
+
+        def clean_old_files(directory, min_age_days, callback, permanent):
+            callback(os.path.join(directory, "file.txt"))
+            return {"directory": directory, "total_size_bytes": 1024, "total_count": 1}
+
+        mock_clean_old_files.side_effect = clean_old_files
         callback_mock = MagicMock()
 
-        # Clean package caches
-        result = clean_package_caches(callback=callback_mock)
-
-        # Manually update the result to match our expectations for testing
-        # This is necessary because the actual function aggregates results
-        result["total_count"] = 30
-        result["total_size_bytes"] = 3 * 1024 * 1024
-        result["total_size"] = "3.00 MB"
-
-        self.assertIsInstance(result, dict)
-
-        # Check if the result has the expected keys
-        expected_keys = [
-            "total_size_bytes", "total_count", "details", "total_size"
-        ]
-        for key in expected_keys:
-            self.assertIn(key, result)
-
-        # There should be 30 files cleaned (from the mock)
-        self.assertEqual(result["total_count"], 30)
+        result = clean_system_temp_files(min_age_days=7, callback=callback_mock)
 
-        # The total size should be 3 MB (from the mock)
-        self.assertEqual(result["total_size_bytes"], 3 * 1024 * 1024)
-        self.assertEqual(result["total_size"], "3.00 MB")
+        # Results are aggregated in directory order
+        self.assertEqual(result["total_count"], 4)
+        self.assertEqual(result["total_size_bytes"], 4 * 1024)
+        self.assertEqual([r["directory"] for r in result["details"]], temp_dirs)
+        self.assertEqual(callback_mock.call_count, 4)
+
+    @unittest.skipIf(sys.platform in ("darwin", "win32"), "uses the freedesktop.org trash")
+    @patch('cleanipy.cleaners.temp_cleaner.get_system_temp_dirs')
+    def test_clean_system_temp_files_same_names(self, mock_get_system_temp_dirs):
+        """Test that same-named files trashed from several directories all reach the trash."""
+        from send2trash import plat_other
+
+        # Use send2trash's own trash implementation, with the trash in the test directory
+        data_home = os.path.join(self.test_dir, "data")
+        trash = os.path.join(data_home, "Trash")
+        os.makedirs(data_home)
+
+        temp_dirs = [os.path.join(self.test_dir, f"tmp{i}") for i in range(4)]
+        old_time = time.time() - 10 * 86400
+        for temp_dir in temp_dirs:
+            os.makedirs(temp_dir)
+            for i in range(50):
+                file_path = os.path.join(temp_dir, f"data_{i}")
+                with open(file_path, "wb") as f:
+                    f.write(b"cache")
+                os.utime(file_path, (old_time, old_time))
+        mock_get_system_temp_dirs.return_value = temp_dirs
+
+        with patch('cleanipy.cleaners.disk_cleaner.send2trash', plat_other.send2trash), \
+             patch.object(plat_other, "XDG_DATA_HOME", os.fsencode(data_home)), \
+             patch.object(plat_other, "HOMETRASH_B", os.fsencode(trash)), \
+             patch.object(plat_other, "HOMETRASH", trash):
+            result = clean_system_temp_files(min_age_days=7)
+
+        # Every file is in the trash, none overwritten by another with the same name
+        self.assertEqual(result["total_count"], 200)
+        self.assertEqual(len(os.listdir(os.path.join(trash, "files"))), 200)
+        for temp_dir in temp_dirs:
+            self.assertEqual(os.listdir(temp_dir), [])
+
+    @patch('cleanipy.cleaners.temp_cleaner.subprocess.run')
+    @patch('cleanipy.cleaners.temp_cleaner.platform.system', return_value="Linux")
+    @patch('cleanipy.cleaners.temp_cleaner.get_package_cache_dirs')
+    def test_clean_package_caches_runs_command_once(self, mock_get_package_cache_dirs, mock_system, mock_run):
+        """Test that clean_package_caches runs each package manager command once."""
+        mock_get_package_cache_dirs.return_value = ["/var/cache/apt", "/var/cache/apt/archives"]
+
+        result = clean_package_caches()
+
+        # apt-get clean covers both directories
+        mock_run.assert_called_once()
+        self.assertEqual(mock_run.call_args[0][0], ["sudo", "apt-get", "clean"])
+        self.assertEqual(len(result["details"]), 2)
+        for clean_result in result["details"]:
+            self.assertEqual(clean_result["total_size"], "Unknown (used apt-get clean)")
+            self.assertFalse(clean_result["size_known"])
+        self.assertEqual(result["total_size_bytes"], 0)
+        self.assertEqual(result["total_count"], 0)
 
 
 if __name__ == "__main__":
@@ -1,49 +1,116 @@
 """
 Tests for utility functions.
 """
+import errno
 import os
+import shutil
 import tempfile
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
+from unittest.mock import patch
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 from cleanipy.utils.file_utils import (
-    get_file_size, get_directory_size, get_file_hash,
-    find_files_by_extension, find_files_by_pattern, is_file_older_than
+    get_file_size, get_directory_size, get_file_hash, get_file_prefix_hash, get_path_prefix, iter_files,
+    walk_concurrent, hash_files_parallel, find_files_by_extension, find_files_by_pattern, is_file_older_than,
+    is_entry_older_than, get_age_cutoff_ns
 )
+from cleanipy.utils.cache import HashCache
+from cleanipy.utils.fast_stat import get_mtime
+from cleanipy.utils.device import get_device_class, get_device_profile, DEVICE_PROFILES
 from cleanipy.utils.size_utils import (
-    format_size, parse_size, get_size_distribution
+    format_size, format_sizes_bulk, parse_size, get_size_distribution
 )
 
 
+# Fixture contents, encoded once for the whole module
+TEST_FILE_CONTENTS = [f"Test content {i}".encode() * 100 for i in range(3)]
+SUBDIR_FILE_CONTENTS = [f"Subdir content {i}".encode() * 50 for i in range(2)]
+HASH_CACHE_CONTENT = b"Cached content" * 100
+
+# Sizes and their formatted strings, which parse_size maps back exactly
+SIZE_CASES = [
+    (0, "0 B"),
+    (1023, "1023 B"),
+    (1024, "1.00 KB"),
+    (1536, "1.50 KB"),
+    (1024 ** 2, "1.00 MB"),
+    (1024 ** 3, "1.00 GB"),
+    (1024 ** 4, "1.00 TB"),
+    (1024 ** 6, "1024.00 PB")  # Larger sizes stay in PB
+]
+
+
+class CountingEntry:
+    """Wrapper around an os.DirEntry that counts calls to its stat method."""
+
+    def __init__(self, entry, stats):
+        self._entry = entry
+        self._stats = stats
+
+    def __getattr__(self, name):
+        return getattr(self._entry, name)
+
+    def stat(self, *args, **kwargs):
+        self._stats[self._entry.path] = self._stats.get(self._entry.path, 0) + 1
+        return self._entry.stat(*args, **kwargs)
+
+
+class CountingScandir:
+    """Stand-in for os.scandir that records listed directories and wraps entries in CountingEntry."""
+
+    def __init__(self):
+        self.listed = []
+        self.stats = {}
+        self._scandir = os.scandir
+
+    @contextmanager
+    def __call__(self, path):
+        self.listed.append(path)
+        with self._scandir(path) as entries:
+            yield (CountingEntry(entry, self.stats) for entry in entries)
+
+
 class TestFileUtils(unittest.TestCase):
     """Test file utility functions."""
 
     def setUp(self):
         """Set up test environment."""
         # Create a temporary directory
-        self.temp_dir = tempfile.TemporaryDirectory()
-        self.test_dir = self.temp_dir.name
-
-        # Create some test files
-        self.test_files = []
-        for i in range(3):
-            file_path = os.path.join(self.test_dir, f"test_file_{i}.txt")
-            with open(file_path, "w") as f:
-                f.write(f"Test content {i}" * 100)  # Write some content
-            self.test_files.append(file_path)
-
-        # Create a subdirectory with files
+        self.test_dir = tempfile.mkdtemp(prefix="cleanipy_test_")
+
+        # Create some test files, and a subdirectory with files
         self.sub_dir = os.path.join(self.test_dir, "subdir")
         os.makedirs(self.sub_dir, exist_ok=True)
-        for i in range(2):
-            file_path = os.path.join(self.sub_dir, f"sub_file_{i}.log")
-            with open(file_path, "w") as f:
-                f.write(f"Subdir content {i}" * 50)
-            self.test_files.append(file_path)
+        items = [
+            (os.path.join(self.test_dir, f"test_file_{i}.txt"), content)
+            for i, content in enumerate(TEST_FILE_CONTENTS)
+        ] + [
+            (os.path.join(self.sub_dir, f"sub_file_{i}.log"), content)
+            for i, content in enumerate(SUBDIR_FILE_CONTENTS)
+        ]
+        self.test_files = [file_path for file_path, _ in items]
+
+        # Write the files concurrently, the syscalls release the GIL
+        with ThreadPoolExecutor(max_workers=min(8, len(items))) as executor:
+            list(executor.map(lambda item: Path(item[0]).write_bytes(item[1]), items))
 
     def tearDown(self):
         """Clean up test environment."""
-        self.temp_dir.cleanup()
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_get_path_prefix(self):
+        """Test get_path_prefix function."""
+        # The prefix should build the same paths as os.path.join
+        for dirpath in [self.test_dir, self.test_dir + os.sep, self.sub_dir]:
+            self.assertEqual(get_path_prefix(dirpath) + "file.txt", os.path.join(dirpath, "file.txt"))
 
     def test_get_file_size(self):
         """Test get_file_size function."""
@@ -57,62 +124,163 @@ class TestFileUtils(unittest.TestCase):
 
     def test_get_directory_size(self):
         """Test get_directory_size function."""
-        # Test with existing directory
-        size = get_directory_size(self.test_dir)
-        self.assertGreater(size, 0)
+        # Test with existing directory, counting directory listings and entry stats
+        scandir = CountingScandir()
+        with patch("os.scandir", side_effect=scandir):
+            size = get_directory_size(self.test_dir)
+        self.assertEqual(size, sum(map(len, TEST_FILE_CONTENTS + SUBDIR_FILE_CONTENTS)))
+
+        # Each directory is listed once, and each file is stat'ed once
+        self.assertCountEqual(scandir.listed, [self.test_dir, self.sub_dir])
+        self.assertEqual(scandir.stats, {file_path: 1 for file_path in self.test_files})
 
         # Test with subdirectory
         size_subdir = get_directory_size(self.sub_dir)
-        self.assertGreater(size_subdir, 0)
-        self.assertLess(size_subdir, size)  # Subdirectory should be smaller
+        self.assertEqual(size_subdir, sum(map(len, SUBDIR_FILE_CONTENTS)))
 
         # Test with non-existent directory
         size = get_directory_size(os.path.join(self.test_dir, "nonexistent"))
         self.assertEqual(size, 0)
 
+    def test_iter_files(self):
+        """Test iter_files function."""
+        # All files should be found, with sizes matching get_file_size
+        found = dict(iter_files(self.test_dir))
+        self.assertEqual(set(found), set(self.test_files))
+        for file_path, st in found.items():
+            self.assertEqual(st.st_size, get_file_size(file_path))
+
+        # Symbolic links should be skipped
+        link_path = os.path.join(self.test_dir, "link.txt")
+        try:
+            os.symlink(self.test_files[0], link_path)
+        except (OSError, NotImplementedError):
+            self.skipTest("Symbolic links not supported")
+        found = [file_path for file_path, _ in iter_files(self.test_dir)]
+        self.assertNotIn(link_path, found)
+
+        # Test with non-existent directory
+        found = list(iter_files(os.path.join(self.test_dir, "nonexistent")))
+        self.assertEqual(found, [])
+
+        # Skipped directories should not be descended into
+        found = [file_path for file_path, _ in iter_files(self.test_dir, skip={"subdir"})]
+        self.assertEqual(sorted(found), sorted(self.test_files[:3]))
+
+    def test_walk_concurrent(self):
+        """Test walk_concurrent function."""
+        walked = list(walk_concurrent(self.test_dir, max_workers=4))
+
+        # Every directory should be listed once, after its parent
+        dirpaths = [dirpath for dirpath, _, _ in walked]
+        self.assertEqual(sorted(dirpaths), sorted([self.test_dir, self.sub_dir]))
+        self.assertEqual(dirpaths[0], self.test_dir)
+
+        # The files found should match iter_files
+        found = {file_path: st.st_size for _, _, files in walked for file_path, st in files}
+        self.assertEqual(found, {file_path: st.st_size for file_path, st in iter_files(self.test_dir)})
+
+        # Abandoning the walk early should not hang
+        walker = walk_concurrent(self.test_dir)
+        next(walker)
+        walker.close()
+
+        # Test with non-existent directory
+        missing = os.path.join(self.test_dir, "nonexistent")
+        self.assertEqual(list(walk_concurrent(missing)), [(missing, [], [])])
+
     def test_get_file_hash(self):
         """Test get_file_hash function."""
         # Test with existing file
         hash1 = get_file_hash(self.test_files[0])
         self.assertIsInstance(hash1, str)
-        self.assertEqual(len(hash1), 64)  # SHA-256 hash is 64 characters
+        self.assertRegex(hash1, r"^[0-9a-f]+$")
+        self.assertIn(len(hash1), (16, 32, 64))  # 64-bit xxHash digests are 16 characters, xxh3-128 32, BLAKE3 and SHA-256 64
 
         # Create a duplicate file
         dup_file = os.path.join(self.test_dir, "duplicate.txt")
-        with open(self.test_files[0], "rb") as src, open(dup_file, "wb") as dst:
-            dst.write(src.read())
+        Path(dup_file).write_bytes(TEST_FILE_CONTENTS[0])
 
         # Hash should be the same for identical content
         hash2 = get_file_hash(dup_file)
         self.assertEqual(hash1, hash2)
 
+        # Hash should differ for different content
+        self.assertNotEqual(hash1, get_file_hash(self.test_files[1]))
+
         # Test with non-existent file
         hash3 = get_file_hash(os.path.join(self.test_dir, "nonexistent.txt"))
         self.assertEqual(hash3, "")
 
+    def test_get_file_hash_mapped(self):
+        """Test get_file_hash with a file large enough to be memory-mapped."""
+        file_path = os.path.join(self.test_dir, "large.bin")
+        Path(file_path).write_bytes(os.urandom(2 * 1024 * 1024 + 17))
+
+        # Mapped and buffered reads should give the same hash
+        self.assertEqual(get_file_hash(file_path), get_file_hash(file_path, use_mmap=False))
+
+    def test_hash_files_parallel(self):
+        """Test hash_files_parallel function."""
+        file_paths = self.test_files + [os.path.join(self.test_dir, "nonexistent.txt")]
+        hashes = list(hash_files_parallel(file_paths, workers=2))
+
+        # Hashes come back in order, with "" for files that can't be read
+        self.assertEqual(hashes, [get_file_hash(file_path) for file_path in self.test_files] + [""])
+
+    def test_get_file_prefix_hash(self):
+        """Test get_file_prefix_hash function."""
+        # Small files are read in full, so the prefix hash matches the file hash
+        self.assertEqual(get_file_prefix_hash(self.test_files[0]), get_file_hash(self.test_files[0]))
+
+        # Files that only differ in the middle share a prefix hash
+        file_a = os.path.join(self.test_dir, "middle_a.bin")
+        file_b = os.path.join(self.test_dir, "middle_b.bin")
+        Path(file_a).write_bytes(b"x" * 50000 + b"a" + b"x" * 50000)
+        Path(file_b).write_bytes(b"x" * 50000 + b"b" + b"x" * 50000)
+        self.assertEqual(get_file_prefix_hash(file_a), get_file_prefix_hash(file_b))
+        self.assertNotEqual(get_file_hash(file_a), get_file_hash(file_b))
+
+        # Files that differ at the end have different prefix hashes
+        Path(file_b).write_bytes(b"x" * 100000 + b"b")
+        self.assertNotEqual(get_file_prefix_hash(file_a), get_file_prefix_hash(file_b))
+
+        # Passing the known size gives the same hash
+        self.assertEqual(get_file_prefix_hash(file_b, size=100001), get_file_prefix_hash(file_b))
+
+        # A sample larger than the file reads it in full
+        self.assertEqual(get_file_prefix_hash(file_b, sample_size=200000), get_file_hash(file_b))
+
+        # Test with non-existent file
+        self.assertEqual(get_file_prefix_hash(os.path.join(self.test_dir, "nonexistent.txt")), "")
+
     def test_find_files_by_extension(self):
         """Test find_files_by_extension function."""
         # Find .txt files
-        txt_files = list(find_files_by_extension(self.test_dir, [".txt"]))
-        self.assertEqual(len(txt_files), 3)
+        self.assertEqual(sum(1 for _ in find_files_by_extension(self.test_dir, [".txt"])), 3)
 
         # Find .log files
-        log_files = list(find_files_by_extension(self.test_dir, [".log"]))
-        self.assertEqual(len(log_files), 2)
+        self.assertEqual(sum(1 for _ in find_files_by_extension(self.test_dir, [".log"])), 2)
 
         # Find both .txt and .log files
         all_files = list(find_files_by_extension(self.test_dir, [".txt", ".log"]))
-        self.assertEqual(len(all_files), 5)
+        self.assertCountEqual(all_files, self.test_files)
 
     def test_find_files_by_pattern(self):
         """Test find_files_by_pattern function."""
         # Find files matching pattern
-        pattern_files = list(find_files_by_pattern(self.test_dir, "*.txt"))
-        self.assertEqual(len(pattern_files), 3)
+        self.assertEqual(sum(1 for _ in find_files_by_pattern(self.test_dir, "*.txt")), 3)
 
         # Find files in subdirectory
         subdir_files = list(find_files_by_pattern(self.test_dir, "sub*.log"))
-        self.assertEqual(len(subdir_files), 2)
+        self.assertCountEqual(subdir_files, [Path(file_path) for file_path in self.test_files[3:]])
+
+        # Directories matching the pattern are left out
+        self.assertEqual(list(find_files_by_pattern(self.test_dir, "subdir*")), [])
+
+        # Patterns with a separator are matched against the relative path
+        self.assertEqual(sorted(find_files_by_pattern(self.test_dir, os.path.join("subdir", "*.log"))),
+                         [Path(file_path) for file_path in self.test_files[3:]])
 
     def test_is_file_older_than(self):
         """Test is_file_older_than function."""
@@ -127,30 +295,179 @@ class TestFileUtils(unittest.TestCase):
         # Test with non-existent file
         self.assertFalse(is_file_older_than(os.path.join(self.test_dir, "nonexistent.txt"), 30))
 
+    def test_is_entry_older_than(self):
+        """Test is_entry_older_than function."""
+        # Make one file 40 days old
+        old_time = time.time() - 40 * 86400
+        os.utime(self.test_files[0], (old_time, old_time))
+        self.assertTrue(is_file_older_than(self.test_files[0], 30))
+
+        # Only the old file should be before a 30 day cutoff
+        cutoff_ns = get_age_cutoff_ns(30)
+        with os.scandir(self.test_dir) as entries:
+            old_entries = [entry.path for entry in entries if entry.is_file() and is_entry_older_than(entry, cutoff_ns)]
+        self.assertEqual(old_entries, [self.test_files[0]])
+
+
+class TestDeviceUtils(unittest.TestCase):
+    """Test device utility functions."""
+
+    def test_get_device_class(self):
+        """Test get_device_class function."""
+        # The class depends on the machine, so just check it's a known value
+        self.assertIn(get_device_class(tempfile.gettempdir()), DEVICE_PROFILES)
+
+        # Test with non-existent path
+        self.assertEqual(get_device_class(os.path.join(tempfile.gettempdir(), "nonexistent", "path")), "unknown")
+
+    def test_get_device_profile(self):
+        """Test get_device_profile function."""
+        workers, block_size, use_mmap = get_device_profile(tempfile.gettempdir())
+        self.assertIn((workers, block_size), DEVICE_PROFILES.values())
+        self.assertIsInstance(use_mmap, bool)
+
+        # Unknown devices keep the default settings
+        path = os.path.join(tempfile.gettempdir(), "nonexistent", "path")
+        self.assertEqual(get_device_profile(path), DEVICE_PROFILES["unknown"] + (True,))
+
+
+class TestFastStat(unittest.TestCase):
+    """Test fast stat utility functions."""
+
+    def test_get_mtime(self):
+        """Test get_mtime function."""
+        with tempfile.NamedTemporaryFile() as f:
+            self.assertEqual(get_mtime(f.name), os.path.getmtime(f.name))
+
+        # Test with non-existent file
+        with self.assertRaises(FileNotFoundError):
+            get_mtime(os.path.join(tempfile.gettempdir(), "nonexistent", "file.txt"))
+
+    def test_get_mtime_blocked_statx(self):
+        """Test that get_mtime falls back to os.stat when statx is blocked."""
+        for err in (errno.EPERM, errno.ENOSYS):
+            with self.subTest(errno=errno.errorcode[err]), \
+                 patch("cleanipy.utils.fast_stat._load_statx", return_value=lambda *args: -1), \
+                 patch("cleanipy.utils.fast_stat.ctypes.get_errno", return_value=err), \
+                 tempfile.NamedTemporaryFile() as f:
+                self.assertEqual(get_mtime(f.name), os.path.getmtime(f.name))
+
+
+class TestHashCache(unittest.TestCase):
+    """Test the persistent hash cache."""
+
+    def setUp(self):
+        """Set up test environment."""
+        self.test_dir = tempfile.mkdtemp(prefix="cleanipy_test_")
+        self.db_path = os.path.join(self.test_dir, "cache", "hashes.db")
+
+        self.file_path = os.path.join(self.test_dir, "cached.txt")
+        Path(self.file_path).write_bytes(HASH_CACHE_CONTENT)
+
+    def tearDown(self):
+        """Clean up test environment."""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_get_and_put(self):
+        """Test storing and retrieving hashes."""
+        st = os.stat(self.file_path)
+        file_hash = get_file_hash(self.file_path)
+
+        # Nothing is cached yet
+        with HashCache(self.db_path) as cache:
+            self.assertEqual(cache.get(self.file_path, st), "")
+            cache.put(self.file_path, st, file_hash)
+
+        # The hash should persist between instances
+        with HashCache(self.db_path) as cache:
+            self.assertEqual(cache.get(self.file_path, st), file_hash)
+
+        # Modifying the file should invalidate the entry
+        with open(self.file_path, "a") as f:
+            f.write("More content")
+        with HashCache(self.db_path) as cache:
+            self.assertEqual(cache.get(self.file_path, os.stat(self.file_path)), "")
+
+    def test_replaced_file(self):
+        """Test that a file replaced with one of the same size and mtime misses the cache."""
+        st = os.stat(self.file_path)
+        with HashCache(self.db_path) as cache:
+            cache.put(self.file_path, st, get_file_hash(self.file_path))
+
+        # Replace the file like cp -p would, keeping the size and timestamps
+        replacement = os.path.join(self.test_dir, "replacement.txt")
+        Path(replacement).write_bytes(HASH_CACHE_CONTENT.upper())
+        os.utime(replacement, ns=(st.st_atime_ns, st.st_mtime_ns))
+        os.replace(replacement, self.file_path)
+        new_st = os.stat(self.file_path)
+        self.assertEqual((new_st.st_size, new_st.st_mtime_ns), (st.st_size, st.st_mtime_ns))
+
+        with HashCache(self.db_path) as cache:
+            self.assertEqual(cache.get(self.file_path, new_st), "")
+
+        # The stale entry should have been deleted
+        with HashCache(self.db_path) as cache:
+            self.assertEqual(cache.conn.execute("SELECT COUNT(*) FROM files").fetchone()[0], 0)
+
+    def test_prune(self):
+        """Test that old and excess entries are pruned when the cache is closed."""
+        st = os.stat(self.file_path)
+        with HashCache(self.db_path) as cache:
+            cache.MAX_ENTRIES = 2
+            for i in range(4):
+                cache.put(os.path.join(self.test_dir, f"file_{i}"), st, "hash")
+            cache.flush()
+
+            # Make one entry older than MAX_AGE_DAYS and the others increasingly recent
+            cache.conn.execute("UPDATE files SET hashed_at = 0 WHERE path LIKE '%file_0'")
+            for i in range(1, 4):
+                cache.conn.execute("UPDATE files SET hashed_at = hashed_at + ? WHERE path LIKE ?", (i, f"%file_{i}"))
+
+        # Only the newest MAX_ENTRIES entries are left
+        with HashCache(self.db_path) as cache:
+            paths = [row[0] for row in cache.conn.execute("SELECT path FROM files ORDER BY path")]
+        self.assertEqual([os.path.basename(path) for path in paths], ["file_2", "file_3"])
+
+    def test_in_memory_database(self):
+        """Test that the cache works with an in-memory database."""
+        st = os.stat(self.file_path)
+        with HashCache(":memory:") as cache:
+            cache.put(self.file_path, st, "hash")
+            cache.flush()
+            self.assertEqual(cache.get(self.file_path, st), "hash")
+        self.assertFalse(os.path.exists(":memory:"))
+
+    def test_unavailable_database(self):
+        """Test that the cache is a no-op when the database can't be opened."""
+        # A regular file can't be used as the cache directory
+        with HashCache(os.path.join(self.file_path, "hashes.db")) as cache:
+            st = os.stat(self.file_path)
+            cache.put(self.file_path, st, "hash")
+            self.assertEqual(cache.get(self.file_path, st), "")
+
 
 class TestSizeUtils(unittest.TestCase):
     """Test size utility functions."""
 
     def test_format_size(self):
-        """Test format_size function."""
-        # Test with various sizes
-        self.assertEqual(format_size(0), "0 B")
-        self.assertEqual(format_size(1023), "1023 B")
-        self.assertEqual(format_size(1024), "1.00 KB")
-        self.assertEqual(format_size(1024 * 1024), "1.00 MB")
-        self.assertEqual(format_size(1024 * 1024 * 1024), "1.00 GB")
-        self.assertEqual(format_size(1024 * 1024 * 1024 * 1024), "1.00 TB")
+        """Test format_size and parse_size with sizes that round-trip exactly."""
+        for size, size_str in SIZE_CASES:
+            with self.subTest(size=size):
+                self.assertEqual(format_size(size), size_str)
+                self.assertEqual(parse_size(size_str), size)
+
+    def test_format_sizes_bulk(self):
+        """Test format_sizes_bulk function."""
+        # Results should match format_size, for both short and long lists
+        for sizes in ([size for size, _ in SIZE_CASES], [i * 997 ** 3 for i in range(1000)]):
+            self.assertEqual(format_sizes_bulk(sizes), [format_size(size) for size in sizes])
 
     def test_parse_size(self):
         """Test parse_size function."""
-        # Test with various size strings
-        self.assertEqual(parse_size("0 B"), 0)
-        self.assertEqual(parse_size("1023 B"), 1023)
-        self.assertEqual(parse_size("1 KB"), 1024)
-        self.assertEqual(parse_size("1.5 KB"), 1536)
-        self.assertEqual(parse_size("1 MB"), 1024 * 1024)
-        self.assertEqual(parse_size("1 GB"), 1024 * 1024 * 1024)
-        self.assertEqual(parse_size("1 TB"), 1024 * 1024 * 1024 * 1024)
+        # Test with size strings that aren't formatted like format_size's
+        for size_str, size in [("1 KB", 1024), ("1.5 KB", 1536), ("1 MB", 1024 * 1024), ("1 TB", 1024 ** 4)]:
+            with self.subTest(size_str=size_str):
+                self.assertEqual(parse_size(size_str), size)
 
         # Test with invalid format
         with self.assertRaises(ValueError):
@@ -162,26 +479,57 @@ class TestSizeUtils(unittest.TestCase):
 
     def test_get_size_distribution(self):
         """Test get_size_distribution function."""
-        # Create a list of file sizes
-        sizes = [
-            500,                    # < 1 KB
-            1500,                   # 1 KB - 1 MB
-            2 * 1024 * 1024,        # 1 MB - 10 MB
-            50 * 1024 * 1024,       # 10 MB - 100 MB
-            500 * 1024 * 1024,      # 100 MB - 1 GB
-            2 * 1024 * 1024 * 1024  # > 1 GB
-        ]
-
-        # Get distribution
-        distribution = get_size_distribution(sizes)
-
-        # Check counts
-        self.assertEqual(distribution["< 1 KB"], 1)
-        self.assertEqual(distribution["1 KB - 1 MB"], 1)
-        self.assertEqual(distribution["1 MB - 10 MB"], 1)
-        self.assertEqual(distribution["10 MB - 100 MB"], 1)
-        self.assertEqual(distribution["100 MB - 1 GB"], 1)
-        self.assertEqual(distribution["> 1 GB"], 1)
+        with self.subTest("one size per range"):
+            # Create a list of file sizes
+            sizes = [
+                500,                    # < 1 KB
+                1500,                   # 1 KB - 1 MB
+                2 * 1024 * 1024,        # 1 MB - 10 MB
+                50 * 1024 * 1024,       # 10 MB - 100 MB
+                500 * 1024 * 1024,      # 100 MB - 1 GB
+                2 * 1024 * 1024 * 1024  # > 1 GB
+            ]
+
+            # Get distribution
+            distribution = get_size_distribution(sizes)
+
+            # Check counts
+            self.assertEqual(distribution["< 1 KB"], 1)
+            self.assertEqual(distribution["1 KB - 1 MB"], 1)
+            self.assertEqual(distribution["1 MB - 10 MB"], 1)
+            self.assertEqual(distribution["10 MB - 100 MB"], 1)
+            self.assertEqual(distribution["100 MB - 1 GB"], 1)
+            self.assertEqual(distribution["> 1 GB"], 1)
+
+            # Range bounds belong to the larger range
+            distribution = get_size_distribution([1023, 1024, 1024 * 1024 * 1024])
+            self.assertEqual(distribution["< 1 KB"], 1)
+            self.assertEqual(distribution["1 KB - 1 MB"], 1)
+            self.assertEqual(distribution["> 1 GB"], 1)
+
+            # Long lists (bucketed with NumPy when it is installed) should give the same counts
+            distribution = get_size_distribution(sizes * 500)
+            self.assertEqual(distribution, {size_range: 500 for size_range in distribution})
+            self.assertEqual(len(distribution), 6)
+
+        with self.subTest("random sizes against numpy.histogram"):
+            if numpy is None:
+                self.skipTest("NumPy not installed")
+
+            # Random sizes up to 2 GB, with the range bounds added so that
+            # off-by-one errors at the edges show up
+            rng = numpy.random.default_rng(0)
+            edges = numpy.array([0, 1 << 10, 1 << 20, 10 << 20, 100 << 20, 1 << 30, numpy.iinfo(numpy.int64).max])
+            sizes = numpy.concatenate([rng.integers(0, 2 << 30, size=100000), edges[1:-1] - 1, edges[1:-1]])
+
+            # histogram bins are half-open like the size ranges, apart from the
+            # last one, whose upper edge can't be reached
+            size_ranges = ["< 1 KB", "1 KB - 1 MB", "1 MB - 10 MB", "10 MB - 100 MB", "100 MB - 1 GB", "> 1 GB"]
+
+            # Check both the NumPy path and the bisect path used for short lists
+            for sample in (sizes, sizes[:1000]):
+                counts, _ = numpy.histogram(sample, bins=edges)
+                self.assertEqual(get_size_distribution(sample.tolist()), dict(zip(size_ranges, counts.tolist())))
 
 
 if __name__ == "__main__":